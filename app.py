@@ -1,17 +1,27 @@
 import customtkinter
 from PIL import Image
-import tempfile
-import uuid
 import os
 import tkinter
 import sys
 import threading
-import platform
-import time
+from concurrent.futures import ThreadPoolExecutor
 
 from utils import *
 from ffmpeg_utils import *
-from dialogs import CustomFilenameDialog
+from metadata_cache import get_metadata_cache
+from config_store import get_config_store
+from path_availability import get_path_availability, AVAILABLE, UNAVAILABLE
+from thumbnail_cache import ThumbnailCache
+from thumbnail_worker import ThumbnailWorkerPool
+from scrub_session import ScrubSession
+from dir_watcher import DirectoryWatcher
+from file_stability import get_stability_tracker
+from library_catalog import get_library_catalog
+from trim_engine import trim_video, trim_segments, configure_chunked_encode, recover_interrupted_replaces, TrimError, TrimCancelled
+from segments import SegmentList
+from preflight import run_preflight
+from job_queue import get_job_queue
+from dialogs import CustomFilenameDialog, VideoBrowserDialog, JobQueueDialog
 from constants import *
 
 
@@ -19,22 +29,30 @@ class VideoTrimmerApp(customtkinter.CTk):
     def __init__(self, initial_input_dir):
         super().__init__()
 
-        if initial_input_dir and os.path.isdir(initial_input_dir):
+        if initial_input_dir and get_path_availability().is_available(initial_input_dir):
             self.current_input_directory = os.path.normpath(initial_input_dir)
         else:
             self.current_input_directory = None
             print("No valid initial directory provided to app, overlay will be used.")
 
         self.output_directory = self.current_input_directory
-        self.location_options = []
-        self.destination_options = []
+        self.location_options = []; self.location_option_paths = {}
+        self.destination_options = []; self.destination_option_paths = {}; self.path_refresh_job = None
         self.recent_videos = []
         self.video_filenames = []
         self.video_path = None
         self.pending_custom_filename = None
         self.current_filename = ""; self.current_creation_time = ""; self.current_duration_str = ""; self.current_size_str = ""
         self.duration = 0.0; self.start_time = 0.0; self.end_time = 0.0; self.original_size_bytes = None
-        self.is_processing = False; self.start_thumb_job = None; self.end_thumb_job = None
+        self.is_processing = False; self.start_thumb_job = None; self.end_thumb_job = None; self.trim_token = None; self.trim_progress = None; self.progress_update_job = None; self.trim_estimate = ""
+        self.segment_lists = {}; self.segments = SegmentList()
+        self.video_record = None; self.video_keyframes = None; self.video_identity = None; self.video_time_base = None; self.load_generation = 0; self.load_future = None; self.load_token = None
+        self.load_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trimmy-metadata")
+        self.thumbnail_cache = ThumbnailCache(); self.thumbnail_pool = ThumbnailWorkerPool(); self.scrub_session = None; self.directory_watcher = None; self.live_refresh_job = None
+        self.library_mode = bool(get_config_store().get("library_recursive", False)); self.library_scan_token = None
+        self.library_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trimmy-library")
+        configure_chunked_encode(get_config_store().get("reencode_chunk_seconds"), get_config_store().get("reencode_chunk_workers"))
+        self.job_queue = get_job_queue(); self.job_queue_dialog = None; self.queue_button_job = None
         self.status_message_clear_job = None
         self.last_trim_status_message = ""
         self.last_trim_status_color = "gray"
@@ -43,8 +61,9 @@ class VideoTrimmerApp(customtkinter.CTk):
         self.up_directory_button = None
 
         self.title("Trimmy")
-        self.geometry("700x900")
-        self.resizable(False, False)
+        window_height = max(MAIN_WINDOW_MIN_HEIGHT, min(MAIN_WINDOW_HEIGHT, self.winfo_screenheight() - 80))
+        self.geometry(f"{MAIN_WINDOW_WIDTH}x{window_height}")
+        self.minsize(MAIN_WINDOW_WIDTH, MAIN_WINDOW_MIN_HEIGHT); self.resizable(False, True)
 
         self.placeholder_pil_image = Image.new('RGB', (THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT), color='gray')
         self.placeholder_ctk_image = customtkinter.CTkImage(light_image=self.placeholder_pil_image,
@@ -52,6 +71,10 @@ class VideoTrimmerApp(customtkinter.CTk):
                                                              size=(THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT))
         self.current_start_thumb_ctk = self.placeholder_ctk_image
         self.current_end_thumb_ctk = self.placeholder_ctk_image
+        filmstrip_size = (FILMSTRIP_TILE_WIDTH * FILMSTRIP_FRAME_COUNT, FILMSTRIP_TILE_HEIGHT)
+        self.placeholder_filmstrip_pil = Image.new('RGB', filmstrip_size, color='gray')
+        self.placeholder_filmstrip_ctk = customtkinter.CTkImage(light_image=self.placeholder_filmstrip_pil, dark_image=self.placeholder_filmstrip_pil, size=filmstrip_size)
+        self.filmstrip_tile_images = None; self.precise_thumb_pending = {True: False, False: False}
 
         self.grid_columnconfigure(0, weight=0)
         self.grid_columnconfigure(1, weight=1)
@@ -111,6 +134,9 @@ class VideoTrimmerApp(customtkinter.CTk):
 
         self.video_select_label = customtkinter.CTkLabel(self, text="Select Video:")
         self.video_select_label.grid(row=2, column=0, columnspan=2, padx=20, pady=(5, 5), sticky="w")
+        self.library_mode_checkbox = customtkinter.CTkCheckBox(self, text="Include subfolders", command=self.on_library_mode_toggled)
+        self.library_mode_checkbox.grid(row=2, column=1, columnspan=3, padx=20, pady=(5, 5), sticky="e")
+        if self.library_mode: self.library_mode_checkbox.select()
         self.video_combobox = customtkinter.CTkComboBox(self, values=["Initializing..."], command=self.on_video_selected)
         self.video_combobox.set("Initializing...")
         self.video_combobox.grid(row=3, column=0, columnspan=3, padx=(20,5), pady=(0, 15), sticky="ew")
@@ -144,10 +170,11 @@ class VideoTrimmerApp(customtkinter.CTk):
         self.thumb_frame = customtkinter.CTkFrame(self)
         self.thumb_frame.grid(row=9, column=0, columnspan=4, padx=20, pady=10, sticky="ew")
         self.thumb_frame.grid_columnconfigure(0, weight=1); self.thumb_frame.grid_columnconfigure(1, weight=1)
-        self.start_thumb_label_text = customtkinter.CTkLabel(self.thumb_frame, text="Start Frame"); self.start_thumb_label_text.grid(row=0, column=0, pady=(5,2))
-        self.start_thumb_label = customtkinter.CTkLabel(self.thumb_frame, text="", image=self.current_start_thumb_ctk); self.start_thumb_label.grid(row=1, column=0, padx=10, pady=(0,10))
-        self.end_thumb_label_text = customtkinter.CTkLabel(self.thumb_frame, text="End Frame"); self.end_thumb_label_text.grid(row=0, column=1, pady=(5,2))
-        self.end_thumb_label = customtkinter.CTkLabel(self.thumb_frame, text="", image=self.current_end_thumb_ctk); self.end_thumb_label.grid(row=1, column=1, padx=10, pady=(0,10))
+        self.filmstrip_label = customtkinter.CTkLabel(self.thumb_frame, text="", image=self.placeholder_filmstrip_ctk); self.filmstrip_label.grid(row=0, column=0, columnspan=2, padx=10, pady=(10,0))
+        self.start_thumb_label_text = customtkinter.CTkLabel(self.thumb_frame, text="Start Frame"); self.start_thumb_label_text.grid(row=1, column=0, pady=(5,2))
+        self.start_thumb_label = customtkinter.CTkLabel(self.thumb_frame, text="", image=self.current_start_thumb_ctk); self.start_thumb_label.grid(row=2, column=0, padx=10, pady=(0,10))
+        self.end_thumb_label_text = customtkinter.CTkLabel(self.thumb_frame, text="End Frame"); self.end_thumb_label_text.grid(row=1, column=1, pady=(5,2))
+        self.end_thumb_label = customtkinter.CTkLabel(self.thumb_frame, text="", image=self.current_end_thumb_ctk); self.end_thumb_label.grid(row=2, column=1, padx=10, pady=(0,10))
 
         self.destination_label = customtkinter.CTkLabel(self, text="Destination:")
         self.destination_label.grid(row=10, column=0, columnspan=4, padx=20, pady=(10, 5), sticky="w")
@@ -155,10 +182,29 @@ class VideoTrimmerApp(customtkinter.CTk):
         self.destination_combobox.grid(row=11, column=0, columnspan=4, padx=20, pady=(0, 5), sticky="ew")
         self.rename_checkbox = customtkinter.CTkCheckBox(self, text="Rename")
         self.rename_checkbox.grid(row=12, column=0, columnspan=4, padx=20, pady=(5, 5), sticky="w")
+        self.snap_keyframes_checkbox = customtkinter.CTkCheckBox(self, text="Snap to keyframes", command=self.on_snap_keyframes_toggled)
+        saved_mode = get_config_store().get("trim_mode", TRIM_MODE_COPY)
+        self.trim_mode_menu = customtkinter.CTkOptionMenu(self, values=list(TRIM_MODE_LABELS), width=210, command=self.on_trim_mode_selected)
+        self.trim_mode_menu.set(next((label for label, mode in TRIM_MODE_LABELS.items() if mode == saved_mode), next(iter(TRIM_MODE_LABELS))))
+        self.trim_mode_menu.grid(row=12, column=1, padx=20, pady=(5, 5), sticky="w")
+        self.snap_keyframes_checkbox.grid(row=12, column=2, columnspan=2, padx=20, pady=(5, 5), sticky="e")
         self.status_label = customtkinter.CTkLabel(self, text="", text_color="gray")
-        self.status_label.grid(row=13, column=0, columnspan=4, padx=20, pady=5, sticky="ew")
+        self.segment_frame = customtkinter.CTkFrame(self, fg_color="transparent")
+        self.segment_frame.grid(row=13, column=0, columnspan=4, padx=20, pady=(0, 5), sticky="ew")
+        self.segment_frame.grid_columnconfigure(1, weight=1)
+        self.add_segment_button = customtkinter.CTkButton(self.segment_frame, text="Add Segment", width=110, command=self.add_segment)
+        self.add_segment_button.grid(row=0, column=0, padx=(0, 10), pady=2)
+        self.segments_label = customtkinter.CTkLabel(self.segment_frame, text="No segments: Trim exports the current range", anchor="w")
+        self.segments_label.grid(row=0, column=1, padx=5, pady=2, sticky="ew")
+        self.join_segments_checkbox = customtkinter.CTkCheckBox(self.segment_frame, text="Join into one file")
+        self.join_segments_checkbox.grid(row=0, column=2, padx=5, pady=2)
+        self.clear_segments_button = customtkinter.CTkButton(self.segment_frame, text="Clear", width=60, command=self.clear_segments)
+        self.clear_segments_button.grid(row=0, column=3, padx=(5, 0), pady=2)
+        self.status_label.grid(row=14, column=0, columnspan=4, padx=20, pady=5, sticky="ew")
+        self.progress_bar = customtkinter.CTkProgressBar(self)
+        self.progress_bar.grid(row=16, column=0, columnspan=4, padx=20, pady=(0, 15), sticky="ew"); self.progress_bar.set(0); self.progress_bar.grid_remove()
         self.button_frame = customtkinter.CTkFrame(self, fg_color="transparent")
-        self.button_frame.grid(row=14, column=0, columnspan=4, padx=20, pady=(10, 20), sticky="ew")
+        self.button_frame.grid(row=15, column=0, columnspan=4, padx=20, pady=(10, 20), sticky="ew")
         self.button_frame.grid_columnconfigure(0, weight=1); self.button_frame.grid_columnconfigure(1, weight=0)
         self.button_frame.grid_columnconfigure(2, weight=0); self.button_frame.grid_columnconfigure(3, weight=0)
         self.button_frame.grid_columnconfigure(4, weight=1)
@@ -166,6 +212,12 @@ class VideoTrimmerApp(customtkinter.CTk):
         self.trim_button.grid(row=0, column=1, padx=10, pady=5)
         self.trim_delete_button = customtkinter.CTkButton(self.button_frame, text="Trim & Delete", command=lambda: self.start_trim_thread(delete_original=True), fg_color="#D32F2F", hover_color="#B71C1C")
         self.trim_delete_button.grid(row=0, column=3, padx=10, pady=5)
+        self.add_queue_button = customtkinter.CTkButton(self.button_frame, text="Add to Queue", command=self.add_to_queue)
+        self.add_queue_button.grid(row=0, column=2, padx=10, pady=5)
+        self.queue_button = customtkinter.CTkButton(self.button_frame, text="Queue", fg_color="transparent", border_width=1, text_color=("gray10", "gray90"), command=self.open_job_queue)
+        self.queue_button.grid(row=1, column=2, padx=10, pady=(0, 5))
+        self._recover_interrupted_replaces()
+        self.job_queue.add_listener(self._on_job_queue_changed); self.job_queue.start(); self._update_queue_button()
 
         self.populate_location_dropdown()
         self.update_destination_dropdown()
@@ -188,7 +240,7 @@ class VideoTrimmerApp(customtkinter.CTk):
         self.center_window()
 
     def _is_root_directory(self, path_to_check):
-        if not path_to_check or not os.path.isdir(path_to_check): return True
+        if not path_to_check: return True
         norm_path = os.path.normpath(path_to_check)
         parent_path = os.path.dirname(norm_path)
         return norm_path == parent_path
@@ -203,7 +255,7 @@ class VideoTrimmerApp(customtkinter.CTk):
     def on_up_directory_clicked(self, event=None):
         if self.is_processing or not self.current_input_directory or self.location_overlay_canvas: return
         current_path = os.path.normpath(self.current_input_directory); parent_dir = os.path.dirname(current_path)
-        if parent_dir == current_path or not os.path.isdir(parent_dir):
+        if parent_dir == current_path or not get_path_availability().is_available(parent_dir):
             self.update_status("Already at the top level.", "orange", is_temporary=True); self._update_up_button_state(); return
         self.current_input_directory = parent_dir; print(f"Moved up to: {self.current_input_directory}")
         self.add_recent_directory(self.current_input_directory); self.populate_location_dropdown()
@@ -225,20 +277,7 @@ class VideoTrimmerApp(customtkinter.CTk):
             self._update_up_button_state()
 
     def add_recent_directory(self, new_path):
-        config_path = os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])), CONFIG_FILENAME)
-        config = {}; 
-        try:
-            if os.path.exists(config_path):
-                with open(config_path, 'r') as f: config = json.load(f)
-        except (json.JSONDecodeError, IOError) as e: print(f"Warning: Could not load config: {e}")
-        recent = config.get("recent_input_directories", []); new_path_norm = os.path.normpath(new_path)
-        recent = [os.path.normpath(p) for p in recent if os.path.isdir(p) and os.path.normpath(p) != new_path_norm]
-        recent.insert(0, new_path_norm); config["recent_input_directories"] = recent[:RECENT_FILES_COUNT]
-        config["last_input_directory"] = new_path_norm
-        try:
-            with open(config_path, 'w') as f: json.dump(config, f, indent=4)
-            print(f"Updated config with last/recent directory: {new_path_norm}")
-        except Exception as e: print(f"Failed to update config file: {e}")
+        get_config_store().add_recent_directory(new_path)
 
     def center_window(self):
         self.update_idletasks()
@@ -251,7 +290,8 @@ class VideoTrimmerApp(customtkinter.CTk):
         state = "disabled" if disable else "normal"; refresh_s = "disabled" if self.is_processing else state
         widgets = [self.start_slider, self.end_slider, self.start_scrub_left_button, self.start_scrub_right_button,
                    self.end_scrub_left_button, self.end_scrub_right_button, self.trim_button, self.trim_delete_button,
-                   self.destination_combobox, self.rename_checkbox]
+                   self.destination_combobox, self.rename_checkbox, self.snap_keyframes_checkbox, self.trim_mode_menu, self.add_queue_button,
+                   self.add_segment_button, self.clear_segments_button, self.join_segments_checkbox]
         if self.refresh_button: self.refresh_button.configure(state=refresh_s)
         if self.is_processing: state = "disabled"
         for widget in widgets:
@@ -268,22 +308,22 @@ class VideoTrimmerApp(customtkinter.CTk):
         if not self.location_overlay_canvas and self.location_combobox: self.location_combobox.configure(state="disabled" if self.is_processing else "readonly")
         self._update_up_button_state()
         if disable and not self.is_processing and not self.video_path:
-            self.display_placeholder_thumbnails(); self.file_info_display.configure(text="Select a video")
+            self.display_placeholder_thumbnails(); self.display_placeholder_filmstrip(); self.file_info_display.configure(text="Select a video")
             self.start_time_label.configure(text="Start Time: --:--:--"); self.end_time_label.configure(text="End Time: --:--:--")
             if self.start_slider: self.start_slider.set(0)
             if self.end_slider: self.end_slider.set(1.0)
 
-    def refresh_video_list(self, preserve_selection=False):
+    def refresh_video_list(self, preserve_selection=False, rescan=True):
         if self.location_overlay_canvas:
             self.video_combobox.set("No videos found"); self.video_combobox.configure(state="disabled"); self.disable_ui_components(True); return
         if not self.current_input_directory:
             self.video_combobox.set("No videos found"); self.video_combobox.configure(state="disabled"); self.disable_ui_components(True)
             self.update_status("Cannot refresh: No directory selected.", "orange", is_temporary=True); return
-        prev_selection = os.path.basename(self.video_path) if preserve_selection and self.video_path else None
-        self.recent_videos = find_recent_videos(self.current_input_directory, RECENT_FILES_COUNT)
-        self.video_filenames = [os.path.basename(p) for p in self.recent_videos]
+        prev_selection = self._video_display_name(self.video_path) if preserve_selection and self.video_path else None
+        self.recent_videos = self._current_recent_videos(rescan)
+        self.video_filenames = [self._video_display_name(p) for p in self.recent_videos]
         if self.video_filenames:
-            self.video_combobox.configure(values=self.video_filenames, state="normal")
+            self.video_combobox.configure(values=self.video_filenames + [BROWSE_VIDEOS_OPTION], state="normal")
             target_sel = None; new_sel_made = False
             if prev_selection and prev_selection in self.video_filenames: target_sel = prev_selection
             elif self.video_filenames: target_sel = self.video_filenames[0]; new_sel_made = True
@@ -300,44 +340,128 @@ class VideoTrimmerApp(customtkinter.CTk):
         if not self.is_processing and self.refresh_button: self.refresh_button.configure(state="normal" if self.current_input_directory else "disabled")
         self._update_up_button_state()
 
+    def _video_display_name(self, path):
+        try: return os.path.relpath(path, self.current_input_directory) if self.current_input_directory else os.path.basename(path)
+        except ValueError: return os.path.basename(path)
+
+    def _current_recent_videos(self, rescan=True):
+        if self.library_mode:
+            if self.directory_watcher: self.directory_watcher.stop(); self.directory_watcher = None
+            if rescan: self._start_library_scan()
+            return get_library_catalog().recent(self.current_input_directory, RECENT_FILES_COUNT)
+        watcher = self._ensure_directory_watcher()
+        return list(watcher.recent) if watcher else find_recent_videos(self.current_input_directory, RECENT_FILES_COUNT)
+
+    def _start_library_scan(self):
+        if self.library_scan_token: self.library_scan_token.cancel()
+        self.library_scan_token = CancelToken()
+        self.library_executor.submit(self._library_scan_worker, self.current_input_directory, self.library_scan_token)
+
+    def _library_scan_worker(self, directory, cancel_token):
+        if cancel_token.cancelled: return
+        catalog = get_library_catalog(); catalog.scan(directory, cancel_token)
+        if not cancel_token.cancelled: self._on_watched_videos_changed(directory, catalog.recent(directory, RECENT_FILES_COUNT))
+
+    def on_library_mode_toggled(self):
+        self.library_mode = self.library_mode_checkbox.get() == 1; get_config_store().update(library_recursive=self.library_mode)
+        if not self.library_mode and self.library_scan_token: self.library_scan_token.cancel(); self.library_scan_token = None
+        if self.current_input_directory and not self.location_overlay_canvas and not self.is_processing: self.refresh_video_list(preserve_selection=True)
+
+    def _ensure_directory_watcher(self, force_rescan=False):
+        if self.directory_watcher and (force_rescan or self.directory_watcher.directory != self.current_input_directory):
+            self.directory_watcher.stop(); self.directory_watcher = None
+        if not self.directory_watcher and self.current_input_directory and get_path_availability().is_available(self.current_input_directory):
+            self.directory_watcher = DirectoryWatcher(self.current_input_directory, RECENT_FILES_COUNT, self._on_watched_videos_changed).start()
+        return self.directory_watcher
+
+    def _on_watched_videos_changed(self, directory, recent_paths):
+        try: self.after(0, self._apply_watched_videos, directory, recent_paths)
+        except RuntimeError: pass
+
+    def _apply_watched_videos(self, directory, recent_paths):
+        if directory != self.current_input_directory or self.is_processing or self.location_overlay_canvas: return
+        if self.video_path and not os.path.exists(self.video_path): self.video_path = None; self.refresh_video_list(rescan=False); return
+        if not self.video_filenames: self.refresh_video_list(rescan=False); return
+        self.recent_videos = list(recent_paths); self.video_filenames = [self._video_display_name(p) for p in self.recent_videos]
+        if self.video_filenames: self.video_combobox.configure(values=self.video_filenames + [BROWSE_VIDEOS_OPTION])
+        print(f"Video list updated: {len(self.video_filenames)} recent file(s).")
+
     def display_placeholder_thumbnails(self):
         self.current_start_thumb_ctk = self.placeholder_ctk_image; self.current_end_thumb_ctk = self.placeholder_ctk_image
         if self.start_thumb_label and self.start_thumb_label.winfo_exists(): self.start_thumb_label.configure(image=self.current_start_thumb_ctk)
         if self.end_thumb_label and self.end_thumb_label.winfo_exists(): self.end_thumb_label.configure(image=self.current_end_thumb_ctk)
 
+    def display_placeholder_filmstrip(self):
+        self.filmstrip_tile_images = None
+        if self.filmstrip_label and self.filmstrip_label.winfo_exists(): self.filmstrip_label.configure(image=self.placeholder_filmstrip_ctk)
+
+    def _approximate_thumbnail(self, time_seconds):
+        if not self.filmstrip_tile_images or not self.duration or self.duration <= 0: return None
+        count = len(self.filmstrip_tile_images)
+        index = min(count - 1, max(0, int(round(time_seconds / (self.duration / count)))))
+        return self.filmstrip_tile_images[index]
+
+    def _load_filmstrip_worker(self, generation, path, identity, duration, cancel_token):
+        if generation != self.load_generation or cancel_token.cancelled: return
+        if self.thumbnail_cache.get_filmstrip(identity): pil_image = None
+        else:
+            pil_image = extract_filmstrip_image(path, duration, FILMSTRIP_FRAME_COUNT, cancel_token)
+            if pil_image is None: return
+        try: self.after(0, self._apply_filmstrip, generation, path, identity, pil_image)
+        except RuntimeError: pass
+
+    def _apply_filmstrip(self, generation, path, identity, pil_image):
+        if generation != self.load_generation or path != self.video_path: return
+        entry = self.thumbnail_cache.put_filmstrip(identity, pil_image) if pil_image is not None else self.thumbnail_cache.get_filmstrip(identity)
+        if entry is None: return
+        if entry.ctk_image is None: entry.ctk_image = customtkinter.CTkImage(light_image=entry.pil_image, dark_image=entry.pil_image, size=entry.pil_image.size)
+        tiles = []
+        for i in range(entry.pil_image.width // FILMSTRIP_TILE_WIDTH):
+            tile = entry.pil_image.crop((i * FILMSTRIP_TILE_WIDTH, 0, (i + 1) * FILMSTRIP_TILE_WIDTH, FILMSTRIP_TILE_HEIGHT))
+            tiles.append(customtkinter.CTkImage(light_image=tile, dark_image=tile, size=(THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT)))
+        self.filmstrip_tile_images = tiles or None
+        if self.filmstrip_label.winfo_exists(): self.filmstrip_label.configure(image=entry.ctk_image)
+        for for_start in (True, False):
+            label = self.start_thumb_label if for_start else self.end_thumb_label
+            approx = self._approximate_thumbnail(self.start_time if for_start else self.end_time)
+            if self.precise_thumb_pending[for_start] and approx and label.winfo_exists(): label.configure(image=approx)
+
     def schedule_thumbnail_update(self, time_seconds, for_start_thumb):
         if not self.video_path: self.display_placeholder_thumbnails(); return
         job_attr = 'start_thumb_job' if for_start_thumb else 'end_thumb_job'
-        if getattr(self, job_attr): self.after_cancel(getattr(self, job_attr))
+        if getattr(self, job_attr): self.after_cancel(getattr(self, job_attr)); setattr(self, job_attr, None)
+        cached = self.thumbnail_cache.get(self.video_identity, time_seconds)
+        if cached: self.thumbnail_pool.cancel('start' if for_start_thumb else 'end'); self._show_thumbnail_entry(cached, for_start_thumb); return
         label = self.start_thumb_label if for_start_thumb else self.end_thumb_label
-        if label and label.winfo_exists(): label.configure(image=self.placeholder_ctk_image)
+        if label and label.winfo_exists(): label.configure(image=self._approximate_thumbnail(time_seconds) or self.placeholder_ctk_image)
+        self.precise_thumb_pending[for_start_thumb] = True
         new_job = self.after(THUMBNAIL_UPDATE_DELAY_MS, lambda t=time_seconds, fst=for_start_thumb: self.generate_and_display_thumbnail(t, fst))
         setattr(self, job_attr, new_job)
 
     def generate_and_display_thumbnail(self, time_seconds, for_start_thumb):
         if not self.video_path or not os.path.exists(self.video_path): self.display_placeholder_thumbnails(); return
-        temp_dir = tempfile.gettempdir(); thumb_file = f"trimmy_thumb_{uuid.uuid4().hex}.jpg"; thumb_path = os.path.join(temp_dir, thumb_file)
-        threading.Thread(target=self._run_thumbnail_extraction, args=(self.video_path, time_seconds, thumb_path, for_start_thumb), daemon=True).start()
-
-    def _run_thumbnail_extraction(self, video_path, time_seconds, thumb_path, for_start_thumb):
-        success = extract_thumbnail(video_path, time_seconds, thumb_path)
-        self.after(0, self._update_thumbnail_label, thumb_path, for_start_thumb, success)
-
-    def _update_thumbnail_label(self, thumb_path, for_start_thumb, success):
+        if self.scrub_session is None: self.scrub_session = ScrubSession(self.video_path, self.video_time_base)
+        session = self.scrub_session; identity = self.video_identity
+        self.thumbnail_pool.submit('start' if for_start_thumb else 'end',
+                                   lambda token: session.get_frame(time_seconds, token),
+                                   lambda pil_image: self.after(0, self._update_thumbnail_label, identity, time_seconds, pil_image, for_start_thumb))
+
+    def _update_thumbnail_label(self, identity, time_seconds, pil_image, for_start_thumb):
+        if identity != self.video_identity: return
+        entry = self.thumbnail_cache.put(identity, time_seconds, pil_image) if pil_image is not None else None
+        if abs(time_seconds - (self.start_time if for_start_thumb else self.end_time)) > 1e-6: return
+        self._show_thumbnail_entry(entry, for_start_thumb)
+
+    def _show_thumbnail_entry(self, entry, for_start_thumb):
+        self.precise_thumb_pending[for_start_thumb] = False
         label = self.start_thumb_label if for_start_thumb else self.end_thumb_label
         if not (label and label.winfo_exists()): return
         new_img = self.placeholder_ctk_image
-        if success and os.path.exists(thumb_path) and os.path.getsize(thumb_path) > 0:
+        if entry is not None:
             try:
-                pil = Image.open(thumb_path); ctk_img = customtkinter.CTkImage(light_image=pil, dark_image=pil, size=(THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT)); new_img = ctk_img
+                if entry.ctk_image is None: entry.ctk_image = customtkinter.CTkImage(light_image=entry.pil_image, dark_image=entry.pil_image, size=(THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT))
+                new_img = entry.ctk_image
             except Exception as e: print(f"Error loading thumbnail: {e}")
-            if os.path.exists(thumb_path) and thumb_path in temp_files_to_cleanup:
-                try: temp_files_to_cleanup.remove(thumb_path); os.remove(thumb_path)
-                except: pass
-        else:
-            if os.path.exists(thumb_path) and thumb_path in temp_files_to_cleanup:
-                try: temp_files_to_cleanup.remove(thumb_path); os.remove(thumb_path)
-                except: pass
         if for_start_thumb: self.current_start_thumb_ctk = new_img
         else: self.current_end_thumb_ctk = new_img
         label.configure(image=new_img)
@@ -345,7 +469,7 @@ class VideoTrimmerApp(customtkinter.CTk):
     def on_refresh_clicked(self):
         if self.is_processing: self.update_status("Cannot refresh during processing.", "orange", True); return
         if self.location_overlay_canvas: self.update_status("Select directory first.", "orange", True); return
-        self.update_status("Refreshing video list...", "blue", True); self.refresh_video_list(True)
+        self.update_status("Refreshing video list...", "blue", True); self._ensure_directory_watcher(force_rescan=True); self.refresh_video_list(True)
 
     def on_location_selected(self, selected_path):
         if self.location_overlay_canvas: return
@@ -357,7 +481,12 @@ class VideoTrimmerApp(customtkinter.CTk):
                 if self.current_input_directory: self.location_combobox.set(self.current_input_directory)
                 else: self.location_combobox.set(BROWSE_OPTION)
                 self._update_up_button_state(); return
-        else: self.current_input_directory = os.path.normpath(selected_path)
+        else:
+            new_dir = self.location_option_paths.get(selected_path, selected_path)
+            if not get_path_availability().is_available(new_dir):
+                self.update_status(f"Unavailable: {new_dir}", "red", True); get_path_availability().invalidate(new_dir)
+                self.location_combobox.set(self.current_input_directory or BROWSE_OPTION); return
+            self.current_input_directory = os.path.normpath(new_dir)
         self.add_recent_directory(self.current_input_directory); self.populate_location_dropdown()
         self.update_destination_dropdown(); self.video_path = None; self.refresh_video_list()
         if not self.video_filenames:
@@ -366,46 +495,54 @@ class VideoTrimmerApp(customtkinter.CTk):
         else: self.update_status(f"Directory: {os.path.basename(self.current_input_directory)}", "green", True)
 
     def populate_location_dropdown(self):
-        recent_dirs = []; config_path = os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])), CONFIG_FILENAME)
-        if os.path.exists(config_path):
-            try:
-                with open(config_path, 'r') as f: config = json.load(f)
-                loaded_recents = config.get("recent_input_directories", [])
-                recent_dirs = [os.path.normpath(p) for p in loaded_recents if os.path.isdir(p)]
-            except Exception as e: print(f"Error loading recents: {e}")
-        dropdown_items = [BROWSE_OPTION]; current_norm = os.path.normpath(self.current_input_directory) if self.current_input_directory and os.path.isdir(self.current_input_directory) else None
-        for r_dir in recent_dirs:
-            if r_dir != current_norm and r_dir not in dropdown_items: dropdown_items.append(r_dir)
+        current_norm = os.path.normpath(self.current_input_directory) if self.current_input_directory else None
+        dropdown_items = [BROWSE_OPTION]; self.location_option_paths = {}
+        for r_dir in get_config_store().get_recent_directories():
+            if r_dir == current_norm or r_dir in self.location_option_paths.values(): continue
+            label = self._path_option_label(r_dir); dropdown_items.append(label); self.location_option_paths[label] = r_dir
         self.location_options = dropdown_items; self.location_combobox.configure(values=self.location_options)
         display_text = BROWSE_OPTION
         if current_norm: display_text = current_norm
         elif self.location_overlay_canvas is not None: display_text = INITIAL_LOCATION_PROMPT
         self.location_combobox.set(display_text)
 
+    def _path_option_label(self, path):
+        state = get_path_availability().check(path, self._on_path_checked)
+        if state == AVAILABLE: return path
+        return path + (PATH_UNAVAILABLE_SUFFIX if state == UNAVAILABLE else PATH_CHECKING_SUFFIX)
+
+    def _on_path_checked(self, path, state):
+        try: self.after(0, self._schedule_path_dropdown_refresh)
+        except RuntimeError: pass
+
+    def _schedule_path_dropdown_refresh(self):
+        if not self.path_refresh_job: self.path_refresh_job = self.after(50, self._refresh_path_dropdowns)
+
+    def _refresh_path_dropdowns(self):
+        self.path_refresh_job = None
+        if not self.location_combobox.winfo_exists(): return
+        self.populate_location_dropdown(); self.update_destination_dropdown()
+
     def update_destination_dropdown(self):
-        if not self.output_directory or not os.path.isdir(self.output_directory):
-            self.output_directory = self.current_input_directory if self.current_input_directory and os.path.isdir(self.current_input_directory) else os.getcwd()
-        parents = get_parent_directories(self.output_directory); dest_set = {BROWSE_OPTION}
-        if self.output_directory: dest_set.add(self.output_directory)
-        if self.current_input_directory: dest_set.add(self.current_input_directory)
-        for p in parents: dest_set.add(p)
-        ordered_opts = [BROWSE_OPTION]
-        if self.output_directory and self.output_directory != BROWSE_OPTION: ordered_opts.append(self.output_directory)
+        if not self.output_directory or get_path_availability().status(self.output_directory) == UNAVAILABLE:
+            self.output_directory = self.current_input_directory or os.getcwd()
+        parents = get_parent_directories(self.output_directory)
+        ordered_opts = [self.output_directory]
         if self.current_input_directory and self.current_input_directory not in ordered_opts: ordered_opts.append(self.current_input_directory)
         for p in parents:
             if p not in ordered_opts: ordered_opts.append(p)
-        for p in dest_set:
-            if p not in ordered_opts: ordered_opts.append(p)
-        self.destination_options = ordered_opts; self.destination_combobox.configure(values=self.destination_options)
-        if self.output_directory in self.destination_options: self.destination_combobox.set(self.output_directory)
-        elif self.destination_options: self.destination_combobox.set(self.destination_options[0])
-        else: self.destination_combobox.set("")
+        self.destination_option_paths = {self._path_option_label(p): p for p in ordered_opts}
+        self.destination_options = [BROWSE_OPTION] + list(self.destination_option_paths); self.destination_combobox.configure(values=self.destination_options)
+        self.destination_combobox.set(next((label for label, p in self.destination_option_paths.items() if p == self.output_directory), BROWSE_OPTION))
 
     def on_destination_selected(self, selected_path):
         if selected_path == BROWSE_OPTION:
             new_dir = tkinter.filedialog.askdirectory(initialdir=self.output_directory or os.getcwd(), title="Select Output Directory")
             if new_dir and os.path.isdir(new_dir): self.output_directory = os.path.normpath(new_dir)
-        else: self.output_directory = os.path.normpath(selected_path)
+        else:
+            new_dir = self.destination_option_paths.get(selected_path, selected_path)
+            if get_path_availability().is_available(new_dir): self.output_directory = os.path.normpath(new_dir)
+            else: self.update_status(f"Unavailable: {new_dir}", "red", True); get_path_availability().invalidate(new_dir)
         self.update_destination_dropdown()
 
     def on_video_selected(self, selected_filename):
@@ -414,28 +551,139 @@ class VideoTrimmerApp(customtkinter.CTk):
             self.video_path = None; self.disable_ui_components(True); self.update_info_display(); self.display_placeholder_thumbnails(); return
         if not self.current_input_directory:
             self.update_status("Error: Input directory not set.", "red", True); self.video_path = None; self.refresh_video_list(); return
-        self.video_path = os.path.join(self.current_input_directory, selected_filename)
+        if selected_filename == BROWSE_VIDEOS_OPTION: self._open_video_browser(); return
+        new_path = os.path.join(self.current_input_directory, selected_filename)
+        if new_path != self.video_path: self._close_scrub_session()
+        self.video_path = new_path
         if not os.path.exists(self.video_path):
             self.update_status(f"Error: {selected_filename} not found.", "red", True); self.video_path = None; self.refresh_video_list(False); return
         self.load_video_data()
 
+    def _open_video_browser(self):
+        current = self._video_display_name(self.video_path) if self.video_path else "Select video"
+        listing = None if self.library_mode else (self.directory_watcher.paths_by_mtime() if self.directory_watcher else list_videos_by_mtime(self.current_input_directory))
+        dialog = VideoBrowserDialog(self, lambda offset, limit, query: self._browser_page(listing, offset, limit, query), self._browser_details)
+        selected = dialog.get_selection()
+        if not selected: self.video_combobox.set(current); return
+        name = self._video_display_name(selected); self.video_combobox.set(name); self.on_video_selected(name)
+
+    def _browser_page(self, listing, offset, limit, query):
+        directory = self.current_input_directory
+        if listing is None:
+            catalog = get_library_catalog()
+            if not query: return catalog.recent(directory, limit, offset), catalog.count(directory)
+            matches = catalog.search(directory, query, VIDEO_BROWSER_SEARCH_LIMIT)
+        else: matches = [p for p in listing if query.lower() in os.path.basename(p).lower()] if query else listing
+        return matches[offset:offset + limit], len(matches)
+
+    def _file_identity(self, path):
+        watcher = self.directory_watcher
+        return (watcher.get_identity(path) if watcher else None) or get_file_identity(path)
+
+    def _browser_details(self, path):
+        identity = self._file_identity(path)
+        if not identity: return None, None
+        record = get_metadata_cache().get(identity)
+        if record is None and self.library_mode:
+            entry = get_library_catalog().get_entry(path)
+            if entry and entry['duration'] is not None and (entry['size'], entry['mtime_ns']) == identity[1:]: return entry['duration'], identity[1]
+        if record is None: record = get_video_record(path)
+        return (record.get('duration') if record else None), identity[1]
+
     def load_video_data(self):
         if not self.video_path: self.disable_ui_components(True); self.update_info_display(); self.display_placeholder_thumbnails(); return
-        self.update_status(f"Loading {os.path.basename(self.video_path)}...", "blue", True)
-        duration_s, ctime, size_s, size_b = get_video_metadata(self.video_path)
-        if duration_s is None:
+        self.load_generation += 1; generation = self.load_generation; path = self.video_path
+        if self.load_future: self.load_future.cancel()
+        if self.load_token: self.load_token.cancel(); self.load_token = None
+        if self.live_refresh_job: self.after_cancel(self.live_refresh_job); self.live_refresh_job = None
+        self.update_status(f"Loading {os.path.basename(path)}...", "blue", True)
+        self.video_identity = None; self.video_keyframes = None; self.thumbnail_pool.cancel(); self._close_scrub_session(); self.disable_ui_components(True)
+        self.display_placeholder_thumbnails(); self.display_placeholder_filmstrip()
+        if self.video_filenames and not self.is_processing: self.video_combobox.configure(state="normal")
+        self.load_future = self.load_executor.submit(self._load_video_data_worker, generation, path)
+
+    def _close_scrub_session(self):
+        if self.scrub_session: self.scrub_session.close(); self.scrub_session = None
+
+    def _load_video_data_worker(self, generation, path):
+        if generation != self.load_generation: return
+        identity = self._file_identity(path); record = get_video_record(path)
+        if self.library_mode and record and not record.get('live'): get_library_catalog().update_media_info(path, record)
+        try: self.after(0, self._apply_video_data, generation, path, identity, record)
+        except RuntimeError: pass
+
+    def _apply_video_data(self, generation, path, identity, record):
+        if generation != self.load_generation or path != self.video_path: print(f"Discarding stale metadata for {os.path.basename(path)}"); return
+        self.load_future = None
+        if record is None:
             self.update_status(f"Error loading metadata for {os.path.basename(self.video_path)}.", "red", True); self.video_path = None; self.refresh_video_list(False)
             if not self.video_path: self.disable_ui_components(True); self.update_info_display(); self.display_placeholder_thumbnails()
             return
-        self.duration = duration_s; self.original_size_bytes = size_b; self.current_filename = os.path.basename(self.video_path)
-        self.current_creation_time = ctime; self.current_size_str = size_s; self.current_duration_str = format_time(self.duration)
+        size_b = record.get('size')
+        self.video_record = record; self.video_identity = identity; self.video_time_base = get_video_time_base(record); self.duration = record.get('duration', 0.0); self.original_size_bytes = size_b; self.current_filename = self._video_display_name(self.video_path)
+        self.current_creation_time = record.get('creation_time', "N/A"); self.current_size_str = format_size(size_b) if size_b is not None else "N/A"; self.current_duration_str = format_time(self.duration)
         self.start_time = 0.0; self.end_time = self.duration if self.duration > 0 else 1.0
         slider_max = self.duration if self.duration > 0 else 1.0
         self.start_slider.configure(to=slider_max); self.end_slider.configure(to=slider_max)
         self.start_slider.set(self.start_time); self.end_slider.set(self.end_time)
         self.update_start_time(self.start_time); self.update_end_time(self.end_time)
-        self.update_info_display(); self.disable_ui_components(False)
+        self.segments = self.segment_lists.setdefault(self.video_path, SegmentList())
+        if self.duration > 0: self.segments.clamp(self.duration)
+        self._update_segments_label(); self.update_info_display(); self.disable_ui_components(False)
         self.update_status(f"Loaded: {self.current_filename}", "green", True); self.rename_checkbox.deselect(); self.pending_custom_filename = None
+        self.load_token = CancelToken()
+        if record.get('live'):
+            self.update_status(f"{self.current_filename} is still being recorded; duration will update.", "orange", True)
+            self.live_refresh_job = self.after(LIVE_REFRESH_INTERVAL_MS, self._refresh_live_video, generation, path)
+        else: self._start_background_indexing(generation, path, identity)
+
+    def _start_background_indexing(self, generation, path, identity):
+        if self.duration > 0: self.load_executor.submit(self._load_filmstrip_worker, generation, path, identity, self.duration, self.load_token)
+        self.load_executor.submit(self._load_keyframes_worker, generation, path, self.load_token)
+
+    def _refresh_live_video(self, generation, path):
+        self.live_refresh_job = None
+        if generation != self.load_generation or path != self.video_path: return
+        self.load_executor.submit(self._live_refresh_worker, generation, path, self.load_token)
+
+    def _live_refresh_worker(self, generation, path, cancel_token):
+        if generation != self.load_generation or cancel_token.cancelled: return
+        identity = get_file_identity(path)
+        if identity and not get_stability_tracker().is_live(path, identity[1], identity[2]):
+            record = get_video_record(path)
+            try: self.after(0, self._apply_settled_record, generation, path, identity, record)
+            except RuntimeError: pass
+            return
+        duration = probe_duration(path, cancel_token)
+        try: self.after(0, self._apply_live_duration, generation, path, identity, duration)
+        except RuntimeError: pass
+
+    def _set_duration(self, duration):
+        follow_end = self.end_time >= self.duration - 0.05
+        self.duration = duration; self.current_duration_str = format_time(self.duration)
+        slider_max = self.duration if self.duration > 0 else 1.0
+        self.start_slider.configure(to=slider_max); self.end_slider.configure(to=slider_max)
+        self.start_slider.set(self.start_time)
+        if follow_end or self.end_time > self.duration: self.end_time = self.duration
+        self.end_slider.set(self.end_time); self._refresh_time_labels()
+
+    def _apply_live_duration(self, generation, path, identity, duration):
+        if generation != self.load_generation or path != self.video_path: return
+        if duration and duration > self.duration and not self.is_processing:
+            self._set_duration(duration)
+            if identity: self.original_size_bytes = identity[1]; self.current_size_str = format_size(identity[1])
+            self.update_info_display()
+        self.live_refresh_job = self.after(LIVE_REFRESH_INTERVAL_MS, self._refresh_live_video, generation, path)
+
+    def _apply_settled_record(self, generation, path, identity, record):
+        if generation != self.load_generation or path != self.video_path: return
+        if record is None or record.get('live'): self.live_refresh_job = self.after(LIVE_REFRESH_INTERVAL_MS, self._refresh_live_video, generation, path); return
+        print(f"{os.path.basename(path)} settled; running full probe and indexing.")
+        size_b = record.get('size')
+        self.video_record = record; self.video_identity = identity; self.video_time_base = get_video_time_base(record)
+        self.original_size_bytes = size_b; self.current_size_str = format_size(size_b) if size_b is not None else "N/A"
+        if not self.is_processing: self._set_duration(record.get('duration', self.duration))
+        self.update_info_display(); self._start_background_indexing(generation, path, identity)
 
     def update_info_display(self):
         if not self.video_path : self.file_info_display.configure(text="Select a video to see details."); return
@@ -443,20 +691,62 @@ class VideoTrimmerApp(customtkinter.CTk):
                 f"Created: {self.current_creation_time}\nSize: {self.current_size_str}")
         self.file_info_display.configure(text=info)
 
+    def _time_label_text(self, prefix, seconds):
+        text = f"{prefix}: {format_time(seconds)}"
+        if self.video_keyframes:
+            prev_kf, next_kf = find_nearest_keyframes(self.video_keyframes, seconds)
+            if prev_kf is not None and abs(seconds - prev_kf) < 0.0005: text += "  [on keyframe]"
+            else:
+                if prev_kf is not None: text += f"  [keyframe -{seconds - prev_kf:.2f}s"
+                else: text += "  [no earlier keyframe"
+                text += f" / +{next_kf - seconds:.2f}s]" if next_kf is not None else "]"
+        return text
+
+    def _refresh_time_labels(self):
+        if not self.video_path: return
+        self.start_time_label.configure(text=self._time_label_text("Start Time", self.start_time))
+        self.end_time_label.configure(text=self._time_label_text("End Time", self.end_time))
+
+    def _load_keyframes_worker(self, generation, path, cancel_token):
+        if generation != self.load_generation or cancel_token.cancelled: return
+        keyframes = get_keyframe_index(path, cancel_token)
+        try: self.after(0, self._apply_keyframes, generation, path, keyframes)
+        except RuntimeError: pass
+
+    def _apply_keyframes(self, generation, path, keyframes):
+        if generation != self.load_generation or path != self.video_path or not keyframes: return
+        self.video_keyframes = keyframes; self._refresh_time_labels()
+        if self.snap_keyframes_checkbox.get() == 1: self.on_snap_keyframes_toggled()
+
+    def on_snap_keyframes_toggled(self):
+        if not self.video_path or self.is_processing or not self.video_keyframes or self.snap_keyframes_checkbox.get() != 1: return
+        self.start_slider.set(self.start_time); self.update_start_time(self.start_time)
+        self.end_slider.set(self.end_time); self.update_end_time(self.end_time)
+
+    def _snap_time(self, seconds):
+        if self.video_keyframes and self.snap_keyframes_checkbox.get() == 1: return snap_to_keyframe(self.video_keyframes, seconds)
+        return seconds
+
     def update_start_time(self, val_str_float):
         try: val = float(val_str_float)
         except ValueError: return
         if self.is_processing: return
+        snapped = self._snap_time(val)
+        if snapped < self.end_time - 0.01: val = snapped
         if val >= self.end_time - 0.01: val = max(0, self.end_time - 0.05)
-        self.start_time = max(0, val); self.start_time_label.configure(text=f"Start Time: {format_time(self.start_time)}")
+        if val != float(val_str_float): self.start_slider.set(val)
+        self.start_time = max(0, val); self.start_time_label.configure(text=self._time_label_text("Start Time", self.start_time))
         self.schedule_thumbnail_update(self.start_time, True)
 
     def update_end_time(self, val_str_float):
         try: val = float(val_str_float)
         except ValueError: return
         if self.is_processing: return
+        snapped = self._snap_time(val)
+        if snapped > self.start_time + 0.01: val = snapped
         if val <= self.start_time + 0.01: val = min(self.duration, self.start_time + 0.05)
-        self.end_time = min(self.duration, val); self.end_time_label.configure(text=f"End Time: {format_time(self.end_time)}")
+        if val != float(val_str_float): self.end_slider.set(val)
+        self.end_time = min(self.duration, val); self.end_time_label.configure(text=self._time_label_text("End Time", self.end_time))
         self.schedule_thumbnail_update(self.end_time, False)
 
     def scrub_start_left(self):
@@ -489,11 +779,15 @@ class VideoTrimmerApp(customtkinter.CTk):
         self.pending_custom_filename = None
         if self.is_processing: return
         if not self.video_path: self.update_status("No video selected.", "red", True); return
-        if not self.output_directory or not os.path.isdir(self.output_directory):
+        if not self.output_directory or not get_path_availability().is_available(self.output_directory):
             self.update_status("Invalid output directory.", "red", True); self.on_destination_selected(BROWSE_OPTION)
-            if not self.output_directory or not os.path.isdir(self.output_directory): self.update_status("Output dir still not set.", "red", True); return
+            if not self.output_directory or not get_path_availability().is_available(self.output_directory): self.update_status("Output dir still not set.", "red", True); return
             self.update_status("Output dir selected. Try again.", "orange", True); return
-        if abs(self.end_time - self.start_time) < 0.1: self.update_status("Trim duration too short.", "red", True); return
+        if not self.segments and abs(self.end_time - self.start_time) < 0.1: self.update_status("Trim duration too short.", "red", True); return
+        if delete_original and get_stability_tracker().is_live(self.video_path): self.update_status("File is still being recorded; cannot delete original yet.", "orange", True); return
+        if delete_original and self.job_queue.has_active_jobs_for(self.video_path): self.update_status("Queued jobs still use this file; cannot delete original yet.", "orange", True); return
+        preflight = self._confirm_preflight(self.job_queue.reserved_bytes(self.output_directory))
+        if preflight is None: return
         if self.rename_checkbox.get() == 1:
             dialog = CustomFilenameDialog(self, title="Set Output Filename"); custom_base = dialog.get_input()
             if custom_base is None: self.rename_checkbox.deselect(); self.update_status("Rename cancelled.", "orange", True)
@@ -501,78 +795,126 @@ class VideoTrimmerApp(customtkinter.CTk):
             else: self.pending_custom_filename = custom_base.strip() + ".mp4"
         if delete_original:
             msg = f"Permanently delete original?\n\n{os.path.basename(self.video_path)}\n\nThis cannot be undone."
+            if self.segments: msg += f"\n\n{len(self.segments)} segment(s) will be exported first."
             if self.pending_custom_filename: msg += f"\n\nTrimmed clip: {self.pending_custom_filename}"
+            msg += f"\n\nEstimate: {preflight.describe()}"
             if not tkinter.messagebox.askyesno("Confirm Delete", msg, icon='warning', parent=self):
                 self.update_status("Trim & Delete cancelled.", "orange", True); self.pending_custom_filename = None; return
-        self.is_processing = True; self.disable_ui_components(True); self.update_status("Starting trim...", "blue", False)
-        temp_out_del = None
-        if delete_original:
-            try: base, ext = os.path.splitext(os.path.basename(self.video_path)); temp_out_del = os.path.join(self.output_directory, f"{base}_temp_trim_{uuid.uuid4().hex}{ext}")
-            except Exception as e: print(f"Error gen temp name: {e}"); self.update_status("Error prepping temp file.", "red", True); self.reset_ui_after_processing(); return
-        threading.Thread(target=self.run_ffmpeg_trim, args=(delete_original, temp_out_del, self.pending_custom_filename), daemon=True).start()
-
-    def run_ffmpeg_trim(self, delete_original, temp_path_for_delete_op, custom_final_name_mp4):
-        global temp_files_to_cleanup; final_out_actual = None; ffmpeg_target = None; original_in = self.video_path
+        self.trim_estimate = preflight.describe()
+        self.is_processing = True; self.disable_ui_components(True); self.update_status(f"Starting trim... {self.trim_estimate}", "blue", False)
+        if delete_original: self.thumbnail_pool.cancel(); self._close_scrub_session()
+        self.trim_token = CancelToken(); self.trim_progress = None; self.progress_bar.set(0); self.progress_bar.grid()
+        threading.Thread(target=self.run_ffmpeg_trim, args=(delete_original, self.pending_custom_filename, self.trim_token, self._selected_trim_mode(),
+                                                           self.segments.segments, self.join_segments_checkbox.get() == 1), daemon=True).start()
+
+    def run_ffmpeg_trim(self, delete_original, custom_final_name_mp4, trim_token, mode, segments=None, join_segments=False):
+        original_in = self.video_path; output_directory = self.output_directory
         try:
-            if not original_in or not os.path.exists(original_in): raise ValueError("Original video path invalid.")
-            in_base, in_ext = os.path.splitext(os.path.basename(original_in))
-            if delete_original:
-                ffmpeg_target = temp_path_for_delete_op;
-                if not ffmpeg_target: raise ValueError("Temp output path missing for delete.")
-                if ffmpeg_target not in temp_files_to_cleanup: temp_files_to_cleanup.append(ffmpeg_target)
-                final_out_actual = os.path.join(self.output_directory, custom_final_name_mp4 if custom_final_name_mp4 else os.path.basename(original_in))
-            else:
-                target_ext = ".mp4" if custom_final_name_mp4 else in_ext
-                file_base = os.path.splitext(custom_final_name_mp4)[0] if custom_final_name_mp4 else f"{in_base}{TRIM_SUFFIX}"
-                out_name = f"{file_base}{target_ext}" if custom_final_name_mp4 else f"{file_base}{target_ext}"
-                final_out_actual = os.path.join(self.output_directory, out_name); counter = 1
-                while os.path.exists(final_out_actual): final_out_actual = os.path.join(self.output_directory, f"{file_base}_{counter}{target_ext}"); counter += 1
-                ffmpeg_target = final_out_actual
-            if final_out_actual is None: final_out_actual = ffmpeg_target
-            start_s = format_time(self.start_time); trim_dur = max(0.1, self.end_time - self.start_time)
-            cmd = ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-ss', start_s, '-i', original_in, '-t', str(trim_dur), '-c', 'copy', '-map', '0', '-avoid_negative_ts', 'make_zero', '-y', ffmpeg_target]
-            self.after(0, lambda: self.update_status("Processing...", "blue", False)); print(f"FFmpeg: {' '.join(cmd)}")
-            si = None; 
-            if platform.system() == 'Windows': si = subprocess.STARTUPINFO(); si.dwFlags |= subprocess.STARTF_USESHOWWINDOW; si.wShowWindow = subprocess.SW_HIDE
-            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', startupinfo=si)
-            _, stderr = proc.communicate()
-            if proc.returncode == 0 and os.path.exists(ffmpeg_target) and os.path.getsize(ffmpeg_target) > 0:
-                msg_base = f"Done! Trimmed: {os.path.basename(final_out_actual)}\n(in {os.path.basename(self.output_directory)})"
-                if delete_original:
-                    self.after(0, lambda: self.update_status("Finalizing...", "blue", False)); time.sleep(0.1)
-                    renamed_ok = False
-                    if os.path.abspath(ffmpeg_target) != os.path.abspath(final_out_actual):
-                        if os.path.exists(final_out_actual):
-                            try: os.remove(final_out_actual)
-                            except OSError as e: print(f"Could not del existing: {e}")
-                        try: os.rename(ffmpeg_target, final_out_actual); renamed_ok = True
-                        except OSError as re: print(f"Rename error: {re}"); final_out_actual = ffmpeg_target; msg_base = f"Trimmed to temp: {os.path.basename(final_out_actual)}\nOriginal NOT deleted."; self.after(0, lambda: self.update_status(msg_base, "orange", True)); self.after(100, lambda p=final_out_actual: self.post_trim_success(p)); return
-                    else: renamed_ok = True
-                    if renamed_ok and ffmpeg_target in temp_files_to_cleanup: temp_files_to_cleanup.remove(ffmpeg_target)
-                    if renamed_ok:
-                        try: os.remove(original_in); print(f"Deleted original: {original_in}"); self.after(0, lambda: self.update_status(f"{msg_base}\nOriginal deleted.", "green", True)); self.after(100, lambda p=final_out_actual, d=original_in: self.post_trim_success(p, d))
-                        except OSError as oe: self.after(0, lambda: self.update_status(f"Trimmed to {os.path.basename(final_out_actual)} BUT FAILED to delete original: {oe}", "orange", True)); self.after(100, lambda p=final_out_actual: self.post_trim_success(p))
-                else: self.after(0, lambda: self.update_status(msg_base, "green", True)); self.after(100, lambda p=final_out_actual: self.post_trim_success(p))
-            else:
-                err_det = stderr if stderr else "No stderr"; err_m = f"FFmpeg failed (code {proc.returncode}):\n{err_det[-500:]}"
-                if proc.returncode==0 and not(os.path.exists(ffmpeg_target) and os.path.getsize(ffmpeg_target)>0): err_m="FFmpeg OK, but output missing/empty."
-                print(err_m); self.after(0, lambda: self.update_status(err_m, "red", True))
-                if ffmpeg_target and os.path.exists(ffmpeg_target):
-                    try: os.remove(ffmpeg_target)
-                    except OSError as e: print(f"Error cleaning failed output: {e}")
-                    if ffmpeg_target in temp_files_to_cleanup: temp_files_to_cleanup.remove(ffmpeg_target)
-                self.after(100, self.reset_ui_after_processing)
+            self.after(0, lambda: self.update_status(f"Processing... {self.trim_estimate}", "blue", False))
+            if segments:
+                result = trim_segments(original_in, segments, output_directory, join_segments, custom_final_name_mp4, delete_original, self.video_time_base, trim_token,
+                                       mode=mode, on_progress=self._on_trim_progress)
+            else: result = trim_video(original_in, self.start_time, self.end_time, output_directory, custom_final_name_mp4, delete_original, self.video_time_base, trim_token,
+                                on_status=lambda msg: self.after(0, lambda: self.update_status(msg, "blue", False)), mode=mode, on_progress=self._on_trim_progress)
+            exported = os.path.basename(result.output_path) if len(result.output_paths) == 1 else f"{len(result.output_paths)} segments"
+            msg_base = f"Done! Trimmed: {exported}\n(in {os.path.basename(output_directory)})"
+            if result.warning: self.after(0, lambda: self.update_status(result.warning, "orange", True))
+            elif result.deleted_original: self.after(0, lambda: self.update_status(f"{msg_base}\nOriginal deleted.", "green", True))
+            else: self.after(0, lambda: self.update_status(msg_base, "green", True))
+            self.after(100, lambda p=result.output_path, d=result.deleted_original: self.post_trim_success(p, d))
+        except TrimError as e:
+            print(e); self.after(0, lambda: self.update_status(str(e), "orange" if isinstance(e, TrimCancelled) else "red", True))
+            self.after(100, self.reset_ui_after_processing)
         except Exception as e:
             import traceback; det_err = traceback.format_exc(); print(f"Trim error: {type(e).__name__}: {e}\n{det_err}")
             self.after(0, lambda: self.update_status(f"Unexpected trim error: {e}", "red", True))
-            if ffmpeg_target and os.path.exists(ffmpeg_target) and ffmpeg_target in temp_files_to_cleanup:
-                try: os.remove(ffmpeg_target); temp_files_to_cleanup.remove(ffmpeg_target)
-                except Exception as ce: print(f"Error cleaning temp output: {ce}")
             self.after(100, self.reset_ui_after_processing)
         finally: self.pending_custom_filename = None
 
+    def _on_trim_progress(self, progress):
+        self.trim_progress = progress
+        if self.progress_update_job: return
+        try: self.progress_update_job = self.after(PROGRESS_UPDATE_INTERVAL_MS, self._apply_trim_progress)
+        except RuntimeError: pass
+
+    def _apply_trim_progress(self):
+        self.progress_update_job = None; progress = self.trim_progress
+        if not self.is_processing or progress is None: return
+        if progress.fraction is not None: self.progress_bar.set(progress.fraction)
+        self.update_status(f"Processing... {progress.describe()}", "blue", False)
+
+    def _hide_progress_bar(self):
+        if self.progress_update_job: self.after_cancel(self.progress_update_job); self.progress_update_job = None
+        self.trim_progress = None; self.progress_bar.grid_remove()
+
+    def _selected_trim_mode(self):
+        return TRIM_MODE_LABELS.get(self.trim_mode_menu.get(), TRIM_MODE_COPY)
+
+    def on_trim_mode_selected(self, label):
+        get_config_store().update(trim_mode=TRIM_MODE_LABELS.get(label, TRIM_MODE_COPY))
+
+    def add_to_queue(self):
+        if not self.video_path: self.update_status("No video selected.", "red", True); return
+        if not self.output_directory or not get_path_availability().is_available(self.output_directory): self.update_status("Invalid output directory.", "red", True); return
+        if not self.segments and abs(self.end_time - self.start_time) < 0.1: self.update_status("Trim duration too short.", "red", True); return
+        preflight = self._confirm_preflight(self.job_queue.reserved_bytes(self.output_directory))
+        if preflight is None: return
+        custom_name = None
+        if self.rename_checkbox.get() == 1:
+            custom_base = CustomFilenameDialog(self, title="Set Output Filename").get_input()
+            if custom_base is None: self.update_status("Queueing cancelled.", "orange", True); return
+            if custom_base.strip(): custom_name = custom_base.strip() + ".mp4"
+        self.job_queue.add(self.video_path, self.start_time, self.end_time, self.output_directory, custom_name, self._selected_trim_mode(), self.video_time_base,
+                           self.segments.segments, self.join_segments_checkbox.get() == 1, preflight.estimated_bytes)
+        detail = f"{len(self.segments)} segments" if self.segments else f"{format_time(self.start_time)}-{format_time(self.end_time)}"
+        self.update_status(f"Queued: {os.path.basename(self.video_path)} ({detail}), {preflight.describe()}", "green", is_temporary=True)
+
+    def _confirm_preflight(self, reserved_bytes=0):
+        media_seconds = self.segments.total_duration if self.segments else abs(self.end_time - self.start_time)
+        preflight = run_preflight(self.video_path, media_seconds, self.output_directory, self._selected_trim_mode(), self.video_record, reserved_bytes, PATH_CHECK_TIMEOUT_S)
+        print(f"Preflight: {preflight.describe()}")
+        if preflight.enough_space: return preflight
+        msg = f"Not enough free space in {self.output_directory}.\n\n{preflight.describe()}\n\nStart anyway?"
+        if tkinter.messagebox.askyesno("Low Disk Space", msg, icon='warning', parent=self): return preflight
+        self.update_status("Cancelled: not enough disk space.", "orange", True); return None
+
+    def add_segment(self):
+        if not self.video_path or self.is_processing: return
+        if abs(self.end_time - self.start_time) < 0.1: self.update_status("Segment too short.", "red", True); return
+        self.segments.add(self.start_time, self.end_time); self._update_segments_label()
+        self.update_status(f"Added segment {format_time(self.start_time)}-{format_time(self.end_time)}", "green", is_temporary=True)
+
+    def clear_segments(self):
+        self.segments.clear(); self._update_segments_label()
+
+    def _update_segments_label(self):
+        if not self.segments: self.segments_label.configure(text="No segments: Trim exports the current range"); return
+        ranges = ", ".join(f"{format_time(a)}-{format_time(b)}" for a, b in self.segments.segments[:3]) + (", ..." if len(self.segments) > 3 else "")
+        self.segments_label.configure(text=f"{len(self.segments)} segment(s), {format_time(self.segments.total_duration)} total: {ranges}")
+
+    def open_job_queue(self):
+        if self.job_queue_dialog and self.job_queue_dialog.winfo_exists(): self.job_queue_dialog.lift(); self.job_queue_dialog.focus_set(); return
+        self.job_queue_dialog = JobQueueDialog(self, self.job_queue)
+
+    def _recover_interrupted_replaces(self):
+        recovered = recover_interrupted_replaces()
+        if recovered: self.update_status(f"Finished {len(recovered)} interrupted Trim & Delete: {os.path.basename(recovered[0])}", "green", is_temporary=True)
+
+    def _on_job_queue_changed(self, job):
+        try: self.after(0, self._schedule_queue_button_update)
+        except RuntimeError: pass
+
+    def _schedule_queue_button_update(self):
+        if not self.queue_button_job: self.queue_button_job = self.after(200, self._update_queue_button)
+
+    def _update_queue_button(self):
+        self.queue_button_job = None; counts = self.job_queue.counts()
+        active = counts.get('running', 0) + counts.get('pending', 0)
+        if self.queue_button.winfo_exists(): self.queue_button.configure(text=f"Queue ({counts.get('running', 0)} running, {counts.get('pending', 0)} waiting)" if active else "Queue")
+
     def post_trim_success(self, output_filepath, deleted_original_path=None):
-        print(f"Trim ended. Final file: {output_filepath or 'None'}"); self.is_processing = False
+        print(f"Trim ended. Final file: {output_filepath or 'None'}"); self.is_processing = False; self._hide_progress_bar()
+        if deleted_original_path: self.segment_lists.pop(deleted_original_path, None)
         should_preserve = True
         if deleted_original_path and self.video_path == deleted_original_path: self.video_path = None; should_preserve = False
         self.refresh_video_list(preserve_selection=should_preserve)
@@ -580,7 +922,7 @@ class VideoTrimmerApp(customtkinter.CTk):
         else: self.disable_ui_components(False)
 
     def reset_ui_after_processing(self):
-        self.is_processing = False; self.pending_custom_filename = None; self.refresh_video_list(True)
+        self.is_processing = False; self.pending_custom_filename = None; self._hide_progress_bar(); self.refresh_video_list(True)
         if not self.video_path and not self.location_overlay_canvas: self.disable_ui_components(True)
 
     def update_status(self, message, color="gray", is_persistent_trim_status=False, is_temporary=False):
@@ -616,7 +958,18 @@ class VideoTrimmerApp(customtkinter.CTk):
         if self.start_thumb_job: self.after_cancel(self.start_thumb_job)
         if self.end_thumb_job: self.after_cancel(self.end_thumb_job)
         if self.status_message_clear_job: self.after_cancel(self.status_message_clear_job)
+        if self.live_refresh_job: self.after_cancel(self.live_refresh_job)
+        if self.path_refresh_job: self.after_cancel(self.path_refresh_job)
+        if self.queue_button_job: self.after_cancel(self.queue_button_job)
+        if self.progress_update_job: self.after_cancel(self.progress_update_job)
         if self.is_processing: print("Warning: Closing during processing.")
-        cleanup_temp_files(); 
+        if self.trim_token: self.trim_token.cancel()
+        if self.load_token: self.load_token.cancel()
+        self.load_generation += 1; self.load_executor.shutdown(wait=False, cancel_futures=True); self.thumbnail_pool.shutdown(); self._close_scrub_session()
+        print(f"Thumbnail cache stats: {self.thumbnail_cache.stats()}")
+        if self.directory_watcher: self.directory_watcher.stop()
+        if self.library_scan_token: self.library_scan_token.cancel()
+        self.library_executor.shutdown(wait=False, cancel_futures=True); self.job_queue.shutdown()
+        get_metadata_cache().flush(); get_config_store().flush(); cleanup_temp_files(); 
         if self.winfo_exists(): self.destroy()
         sys.exit(0)
\ No newline at end of file
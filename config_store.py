@@ -0,0 +1,78 @@
+import os
+import json
+import copy
+import threading
+from utils import get_app_file_path
+from path_availability import get_path_availability
+from constants import CONFIG_FILENAME, CONFIG_SAVE_DELAY_S, RECENT_FILES_COUNT
+
+class ConfigStore:
+    def __init__(self, config_path):
+        self.config_path = config_path
+        self._data = {}; self._lock = threading.Lock(); self._io_lock = threading.Lock(); self._save_timer = None; self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            if os.path.exists(self.config_path):
+                with open(self.config_path, 'r') as f: self._data = json.load(f)
+                if not isinstance(self._data, dict): print("Config file is not a JSON object; ignoring it."); self._data = {}
+        except (json.JSONDecodeError, IOError) as e: print(f"Error loading config file ({self.config_path}): {e}"); self._data = {}
+
+    def get(self, key, default=None):
+        with self._lock: return copy.deepcopy(self._data.get(key, default))
+
+    def update(self, **values):
+        with self._lock:
+            changed = any(self._data.get(k) != v for k, v in values.items())
+            if not changed: return
+            self._data.update(copy.deepcopy(values)); self._dirty = True
+        self._schedule_save()
+
+    def get_recent_directories(self):
+        return [os.path.normpath(p) for p in self.get("recent_input_directories", []) if isinstance(p, str)]
+
+    def add_recent_directory(self, new_path):
+        new_path_norm = os.path.normpath(new_path)
+        recent = [p for p in self.get_recent_directories() if p != new_path_norm]
+        recent.insert(0, new_path_norm)
+        self.update(recent_input_directories=recent[:RECENT_FILES_COUNT], last_input_directory=new_path_norm)
+        print(f"Updated config with last/recent directory: {new_path_norm}")
+
+    def _schedule_save(self):
+        with self._lock:
+            if self._save_timer: self._save_timer.cancel()
+            self._save_timer = threading.Timer(CONFIG_SAVE_DELAY_S, self.flush); self._save_timer.daemon = True; self._save_timer.start()
+
+    def flush(self):
+        with self._io_lock:
+            with self._lock:
+                if self._save_timer: self._save_timer.cancel(); self._save_timer = None
+                if not self._dirty: return
+                payload = json.dumps(self._data, indent=4); self._dirty = False
+            tmp_path = f"{self.config_path}.tmp"
+            try:
+                with open(tmp_path, 'w') as f: f.write(payload); f.flush(); os.fsync(f.fileno())
+                os.replace(tmp_path, self.config_path)
+            except OSError as e:
+                print(f"Failed to update config file: {e}")
+                with self._lock: self._dirty = True
+                try: os.remove(tmp_path)
+                except OSError: pass
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_config_store():
+    global _store
+    with _store_lock:
+        if _store is None: _store = ConfigStore(get_app_file_path(CONFIG_FILENAME))
+        return _store
+
+def load_last_directory():
+    last_dir = get_config_store().get("last_input_directory")
+    if last_dir and get_path_availability().is_available(last_dir):
+        print(f"Loaded last directory from config: {last_dir}")
+        return last_dir
+    print("No valid last directory found in config or config does not exist.")
+    return None
@@ -3,11 +3,65 @@ RECENT_FILES_COUNT = 5
 THUMBNAIL_WIDTH = 320
 THUMBNAIL_HEIGHT = 180
 THUMBNAIL_UPDATE_DELAY_MS = 300
+MAIN_WINDOW_WIDTH = 700
+MAIN_WINDOW_HEIGHT = 1060
+MAIN_WINDOW_MIN_HEIGHT = 760
 TRIM_SUFFIX = "_trimmy"
+TRIM_MODE_COPY = "copy"
+TRIM_MODE_SMART = "smart"
+TRIM_MODE_REENCODE = "reencode"
+TRIM_MODES = (TRIM_MODE_COPY, TRIM_MODE_SMART, TRIM_MODE_REENCODE)
+TRIM_MODE_LABELS = {"Fast (keyframe copy)": TRIM_MODE_COPY, "Smart cut (frame-accurate)": TRIM_MODE_SMART, "Re-encode (frame-accurate)": TRIM_MODE_REENCODE}
+SMART_CUT_ENCODERS = {'h264': 'libx264', 'hevc': 'libx265'}
+SMART_CUT_CRF = 16
+MIN_SEGMENT_DURATION_S = 0.1
+SEGMENT_SUFFIX = "_part"
+REENCODE_VIDEO_ARGS = ['-c:v', 'libx264', '-preset', 'medium', '-crf', '18', '-pix_fmt', 'yuv420p']
+REENCODE_AUDIO_BITRATE = 192000
+REENCODE_AUDIO_ARGS = ['-c:a', 'aac', '-b:a', f"{REENCODE_AUDIO_BITRATE // 1000}k"]
+REENCODE_OUTPUT_ARGS = REENCODE_VIDEO_ARGS + REENCODE_AUDIO_ARGS
+CHUNKED_ENCODE_CHUNK_S = 60.0
+CHUNKED_ENCODE_WORKERS = 4
 SCRUB_INCREMENT = 0.5
 temp_files_to_cleanup = []
 BROWSE_OPTION = "Browse..."
 STATUS_MESSAGE_CLEAR_DELAY_MS = 5000
 CONFIG_FILENAME = "config.json"
+CONFIG_SAVE_DELAY_S = 1.0
+PATH_CHECK_TIMEOUT_S = 2.0
+PATH_CHECK_TTL_S = 30.0
+PATH_CHECK_FAILED_TTL_S = 10.0
+PATH_CHECKING_SUFFIX = "  (checking\u2026)"
+PATH_UNAVAILABLE_SUFFIX = "  (unavailable)"
 INITIAL_LOCATION_PROMPT = "Click to Select Video Directory..."
-FILENAME_INVALID_CHARS = r'/\:*?"<>|'
\ No newline at end of file
+FILENAME_INVALID_CHARS = r'/\:*?"<>|'
+METADATA_CACHE_FILENAME = "metadata_cache.json"
+METADATA_CACHE_MAX_ENTRIES = 2000
+METADATA_CACHE_SAVE_DELAY_S = 2.0
+THUMBNAIL_CACHE_MAX_BYTES = 64 * 1024 * 1024
+THUMBNAIL_CACHE_BUCKET_S = 0.1
+THUMBNAIL_WORKER_COUNT = 2
+SCRUB_SESSION_MAX_FORWARD_DECODE_S = 2.0
+FILMSTRIP_FRAME_COUNT = 10
+FILMSTRIP_TILE_WIDTH = 64
+FILMSTRIP_TILE_HEIGHT = 36
+WATCHER_POLL_INTERVAL_S = 2.0
+WATCHER_COALESCE_S = 0.5
+FILE_SETTLE_SECONDS = 10.0
+LIVE_REFRESH_INTERVAL_MS = 5000
+LIBRARY_DB_FILENAME = "library.db"
+BROWSE_VIDEOS_OPTION = "Browse all videos..."
+VIDEO_BROWSER_PAGE_SIZE = 15
+VIDEO_BROWSER_SEARCH_LIMIT = 5000
+JOB_QUEUE_FILENAME = "job_queue.json"
+JOB_QUEUE_COPY_WORKERS = 2
+JOB_QUEUE_REENCODE_WORKERS = 1
+JOB_QUEUE_SAVE_DELAY_S = 0.5
+TRIM_METRICS_FILENAME = "trim_metrics.jsonl"
+REPLACE_JOURNAL_FILENAME = "replace_journal.json"
+REPLACE_COPY_BLOCK_SIZE = 8 * 1024 * 1024
+PREFLIGHT_SIZE_MARGIN = 1.1
+PREFLIGHT_MIN_FREE_BYTES = 256 * 1024 * 1024
+PREFLIGHT_HISTORY_SAMPLES = 20
+PROGRESS_UPDATE_INTERVAL_MS = 200
+JOB_QUEUE_PROGRESS_NOTIFY_S = 0.5
@@ -1,6 +1,9 @@
+import os
 import tkinter
 import customtkinter
-from constants import FILENAME_INVALID_CHARS
+from concurrent.futures import ThreadPoolExecutor
+from utils import format_size, format_time
+from constants import FILENAME_INVALID_CHARS, VIDEO_BROWSER_PAGE_SIZE
 
 class CustomFilenameDialog(customtkinter.CTkToplevel):
     def __init__(self, parent, title="Set Output Filename"):
@@ -58,4 +61,170 @@ class CustomFilenameDialog(customtkinter.CTkToplevel):
         self.grab_release(); self.destroy()
     def get_input(self):
         self.master.wait_window(self)
-        return self.result
\ No newline at end of file
+        return self.result
+
+class VideoBrowserDialog(customtkinter.CTkToplevel):
+    def __init__(self, parent, fetch_page, fetch_details, title="All Videos"):
+        super().__init__(parent)
+        self.transient(parent)
+        self.title(title)
+        self.lift()
+        self.grab_set()
+        self.result = None
+        self.fetch_page = fetch_page; self.fetch_details = fetch_details
+        self.offset = 0; self.total = 0; self.page_paths = []; self.generation = 0; self.search_job = None
+        self.details_cache = {}; self.details_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="trimmy-browser")
+        self.grid_columnconfigure(0, weight=1)
+        self.search_var = tkinter.StringVar()
+        self.search_var.trace_add("write", self._on_search_changed)
+        self.search_entry = customtkinter.CTkEntry(self, textvariable=self.search_var, placeholder_text="Search by name...")
+        self.search_entry.grid(row=0, column=0, padx=20, pady=(20, 10), sticky="ew")
+        self.rows_frame = customtkinter.CTkFrame(self)
+        self.rows_frame.grid(row=1, column=0, padx=20, pady=(0, 10), sticky="nsew")
+        self.rows_frame.grid_columnconfigure(0, weight=1)
+        self.row_widgets = []
+        for i in range(VIDEO_BROWSER_PAGE_SIZE):
+            name_button = customtkinter.CTkButton(self.rows_frame, text="", anchor="w", width=380, fg_color="transparent", text_color=("gray10", "gray90"),
+                                                  hover_color=("gray75", "gray30"), command=lambda idx=i: self._on_row_clicked(idx))
+            name_button.grid(row=i, column=0, padx=(5, 5), pady=1, sticky="ew")
+            duration_label = customtkinter.CTkLabel(self.rows_frame, text="", width=70, anchor="e"); duration_label.grid(row=i, column=1, padx=5, pady=1)
+            size_label = customtkinter.CTkLabel(self.rows_frame, text="", width=80, anchor="e"); size_label.grid(row=i, column=2, padx=(5, 10), pady=1)
+            self.row_widgets.append((name_button, duration_label, size_label))
+        self.nav_frame = customtkinter.CTkFrame(self, fg_color="transparent")
+        self.nav_frame.grid(row=2, column=0, padx=20, pady=(0, 20), sticky="ew")
+        self.nav_frame.grid_columnconfigure(1, weight=1)
+        self.prev_button = customtkinter.CTkButton(self.nav_frame, text="< Prev", width=80, command=lambda: self._scroll(-VIDEO_BROWSER_PAGE_SIZE))
+        self.prev_button.grid(row=0, column=0, padx=5)
+        self.page_label = customtkinter.CTkLabel(self.nav_frame, text="")
+        self.page_label.grid(row=0, column=1, padx=5)
+        self.next_button = customtkinter.CTkButton(self.nav_frame, text="Next >", width=80, command=lambda: self._scroll(VIDEO_BROWSER_PAGE_SIZE))
+        self.next_button.grid(row=0, column=2, padx=5)
+        self.cancel_button = customtkinter.CTkButton(self.nav_frame, text="Cancel", width=80, command=self._on_cancel)
+        self.cancel_button.grid(row=0, column=3, padx=5)
+        self.bind("<MouseWheel>", lambda event: self._scroll(-3 if event.delta > 0 else 3))
+        self.bind("<Button-4>", lambda event: self._scroll(-3))
+        self.bind("<Button-5>", lambda event: self._scroll(3))
+        self.bind("<Prior>", lambda event: self._scroll(-VIDEO_BROWSER_PAGE_SIZE))
+        self.bind("<Next>", lambda event: self._scroll(VIDEO_BROWSER_PAGE_SIZE))
+        self.bind("<Escape>", lambda event: self._on_cancel())
+        self.protocol("WM_DELETE_WINDOW", self._on_cancel)
+        self.search_entry.focus_set()
+        self._load_page()
+        self.update_idletasks()
+        parent_x = parent.winfo_x(); parent_y = parent.winfo_y()
+        parent_width = parent.winfo_width(); parent_height = parent.winfo_height()
+        dialog_width = self.winfo_reqwidth(); dialog_height = self.winfo_reqheight()
+        x = parent_x + (parent_width // 2) - (dialog_width // 2)
+        y = parent_y + (parent_height // 2) - (dialog_height // 2)
+        self.geometry(f"{dialog_width}x{dialog_height}+{x}+{y}")
+    def _on_search_changed(self, *args):
+        if self.search_job: self.after_cancel(self.search_job)
+        self.search_job = self.after(250, self._apply_search)
+    def _apply_search(self):
+        self.search_job = None; self.offset = 0; self._load_page()
+    def _scroll(self, delta):
+        new_offset = max(0, min(self.offset + delta, max(0, self.total - VIDEO_BROWSER_PAGE_SIZE)))
+        if new_offset != self.offset: self.offset = new_offset; self._load_page()
+    def _load_page(self):
+        self.generation += 1
+        self.page_paths, self.total = self.fetch_page(self.offset, VIDEO_BROWSER_PAGE_SIZE, self.search_var.get().strip())
+        for i, (name_button, duration_label, size_label) in enumerate(self.row_widgets):
+            if i < len(self.page_paths):
+                path = self.page_paths[i]; details = self.details_cache.get(path)
+                name_button.configure(text=os.path.basename(path), state="normal")
+                duration_label.configure(text=format_time(details[0]) if details and details[0] is not None else "...")
+                size_label.configure(text=format_size(details[1]) if details else "...")
+                if details is None: self.details_executor.submit(self._fetch_details_worker, self.generation, path)
+            else:
+                name_button.configure(text="", state="disabled"); duration_label.configure(text=""); size_label.configure(text="")
+        last = min(self.offset + len(self.page_paths), self.total)
+        self.page_label.configure(text=f"{self.offset + 1 if self.total else 0}-{last} of {self.total}")
+        self.prev_button.configure(state="normal" if self.offset > 0 else "disabled")
+        self.next_button.configure(state="normal" if last < self.total else "disabled")
+    def _fetch_details_worker(self, generation, path):
+        if generation != self.generation: return
+        details = self.fetch_details(path)
+        try: self.after(0, self._apply_details, generation, path, details)
+        except RuntimeError: pass
+    def _apply_details(self, generation, path, details):
+        if not self.winfo_exists(): return
+        self.details_cache[path] = details
+        if generation != self.generation or path not in self.page_paths: return
+        _, duration_label, size_label = self.row_widgets[self.page_paths.index(path)]
+        duration_label.configure(text=format_time(details[0]) if details[0] is not None else "N/A")
+        size_label.configure(text=format_size(details[1]) if details[1] is not None else "N/A")
+    def _on_row_clicked(self, index):
+        if index < len(self.page_paths):
+            self.result = self.page_paths[index]
+            self._close()
+    def _on_cancel(self):
+        self.result = None
+        self._close()
+    def _close(self):
+        self.generation += 1; self.details_executor.shutdown(wait=False, cancel_futures=True)
+        self.grab_release(); self.destroy()
+    def get_selection(self):
+        self.master.wait_window(self)
+        return self.result
+
+class JobQueueDialog(customtkinter.CTkToplevel):
+    STATUS_COLORS = {"pending": "gray", "running": "#1E88E5", "done": "green", "failed": "red", "cancelled": "orange"}
+    def __init__(self, parent, job_queue, title="Trim Queue"):
+        super().__init__(parent)
+        self.transient(parent)
+        self.title(title)
+        self.lift()
+        self.job_queue = job_queue; self.render_job = None; self.row_widgets = {}
+        self.grid_columnconfigure(0, weight=1); self.grid_rowconfigure(1, weight=1)
+        self.summary_label = customtkinter.CTkLabel(self, text="", anchor="w")
+        self.summary_label.grid(row=0, column=0, padx=20, pady=(20, 5), sticky="ew")
+        self.rows_frame = customtkinter.CTkScrollableFrame(self, width=560, height=320)
+        self.rows_frame.grid(row=1, column=0, padx=20, pady=(0, 10), sticky="nsew")
+        self.rows_frame.grid_columnconfigure(0, weight=1)
+        self.button_frame = customtkinter.CTkFrame(self, fg_color="transparent")
+        self.button_frame.grid(row=2, column=0, padx=20, pady=(0, 20), sticky="ew")
+        self.button_frame.grid_columnconfigure(0, weight=1)
+        self.clear_button = customtkinter.CTkButton(self.button_frame, text="Clear Finished", width=120, command=self.job_queue.clear_finished)
+        self.clear_button.grid(row=0, column=1, padx=5)
+        self.close_button = customtkinter.CTkButton(self.button_frame, text="Close", width=80, command=self._close)
+        self.close_button.grid(row=0, column=2, padx=5)
+        self.bind("<Escape>", lambda event: self._close())
+        self.protocol("WM_DELETE_WINDOW", self._close)
+        self.job_queue.add_listener(self._on_job_changed)
+        self._render()
+    def _on_job_changed(self, job):
+        try: self.after(0, self._schedule_render)
+        except RuntimeError: pass
+    def _schedule_render(self):
+        if not self.render_job and self.winfo_exists(): self.render_job = self.after(200, self._render)
+    def _render(self):
+        self.render_job = None; jobs = list(reversed(self.job_queue.jobs())); current_ids = {job.id for job in jobs}
+        for job_id in [job_id for job_id in self.row_widgets if job_id not in current_ids]:
+            for widget in self.row_widgets.pop(job_id)['widgets']: widget.destroy()
+        for i, job in enumerate(jobs):
+            span = f"{len(job.segments)} segments{' joined' if job.join else ''}" if job.segments else f"{format_time(job.start)}-{format_time(job.end)}"
+            text = f"{os.path.basename(job.source)}  {span}  [{job.mode}]"
+            if job.status == "running" and job.progress: text += f"\n{job.progress}"
+            elif job.error: text += f"\n{job.error.splitlines()[0][:90]}"
+            elif job.output_path: text += f"\n-> {os.path.basename(job.output_path)}"
+            cancel_state = "normal" if job.status in ("pending", "running") else "disabled"
+            row = self.row_widgets.get(job.id)
+            if row is None:
+                status_label = customtkinter.CTkLabel(self.rows_frame, text=job.status, width=80, anchor="w", text_color=self.STATUS_COLORS.get(job.status, "gray"))
+                name_label = customtkinter.CTkLabel(self.rows_frame, text=text, anchor="w", justify="left")
+                cancel_button = customtkinter.CTkButton(self.rows_frame, text="Cancel", width=70, command=lambda job_id=job.id: self.job_queue.cancel(job_id), state=cancel_state)
+                row = self.row_widgets[job.id] = {'row': None, 'widgets': (status_label, name_label, cancel_button), 'state': (job.status, text, cancel_state)}
+            else:
+                status_label, name_label, cancel_button = row['widgets']
+                if row['state'] != (job.status, text, cancel_state):
+                    status_label.configure(text=job.status, text_color=self.STATUS_COLORS.get(job.status, "gray")); name_label.configure(text=text)
+                    cancel_button.configure(state=cancel_state); row['state'] = (job.status, text, cancel_state)
+            if row['row'] != i:
+                name_label.grid(row=i, column=0, padx=5, pady=2, sticky="ew"); status_label.grid(row=i, column=1, padx=5, pady=2, sticky="w")
+                cancel_button.grid(row=i, column=2, padx=5, pady=2); row['row'] = i
+        counts = self.job_queue.counts()
+        self.summary_label.configure(text=f"{len(jobs)} job(s): {counts.get('running', 0)} running, {counts.get('pending', 0)} pending, {counts.get('done', 0)} done, {counts.get('failed', 0)} failed")
+    def _close(self):
+        self.job_queue.remove_listener(self._on_job_changed)
+        if self.render_job: self.after_cancel(self.render_job); self.render_job = None
+        self.destroy()
@@ -0,0 +1,128 @@
+import os
+import sys
+import time
+import heapq
+import select
+import struct
+import threading
+from ffmpeg_utils import scan_video_entries, is_video_filename
+from file_stability import get_stability_tracker
+from constants import WATCHER_POLL_INTERVAL_S, WATCHER_COALESCE_S
+
+IN_MODIFY = 0x2; IN_ATTRIB = 0x4; IN_CLOSE_WRITE = 0x8; IN_MOVED_FROM = 0x40; IN_MOVED_TO = 0x80
+IN_CREATE = 0x100; IN_DELETE = 0x200; IN_DELETE_SELF = 0x400; IN_MOVE_SELF = 0x800; IN_Q_OVERFLOW = 0x4000
+IN_NONBLOCK = 0o4000; IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+_EVENT_HEADER = struct.Struct('iIII')
+
+def _open_inotify(directory):
+    if not sys.platform.startswith('linux'): return None
+    try:
+        import ctypes, ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0: raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK) < 0:
+            err = ctypes.get_errno(); os.close(fd); raise OSError(err, "inotify_add_watch failed")
+        return fd
+    except (OSError, AttributeError) as e: print(f"inotify unavailable for {directory}, polling instead: {e}"); return None
+
+class DirectoryWatcher:
+    def __init__(self, directory, count, on_change):
+        self.directory = directory; self.count = count; self.on_change = on_change
+        self.index = {}; self.recent = []
+        self._lock = threading.Lock(); self._stop = threading.Event(); self._dirty = set(); self._needs_rescan = False
+        self._dir_mtime_ns = None; self._inotify_fd = None; self._thread = None
+
+    def start(self):
+        self._rescan()
+        self._inotify_fd = _open_inotify(self.directory)
+        self._thread = threading.Thread(target=self._run, name="trimmy-dirwatch", daemon=True); self._thread.start()
+        print(f"Watching {self.directory} ({'inotify' if self._inotify_fd is not None else 'polling'}).")
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def paths_by_mtime(self):
+        with self._lock: return [path for path, _ in sorted(self.index.items(), key=lambda item: item[1][1], reverse=True)]
+
+    def get_identity(self, path):
+        with self._lock:
+            stat = self.index.get(path)
+            return (os.path.normcase(os.path.abspath(path)), stat[0], stat[1]) if stat else None
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                if self._inotify_fd is not None: self._wait_inotify()
+                else: self._stop.wait(WATCHER_POLL_INTERVAL_S); self._poll()
+                if self._stop.is_set(): break
+                self._apply_pending()
+        except Exception as e: print(f"Directory watcher error ({self.directory}): {e}")
+        finally:
+            if self._inotify_fd is not None:
+                try: os.close(self._inotify_fd)
+                except OSError: pass
+                self._inotify_fd = None
+
+    def _wait_inotify(self):
+        ready, _, _ = select.select([self._inotify_fd], [], [], WATCHER_POLL_INTERVAL_S)
+        if not ready: self._poll(); return
+        deadline = time.monotonic() + WATCHER_COALESCE_S
+        while not self._stop.is_set():
+            try: data = os.read(self._inotify_fd, 65536)
+            except BlockingIOError: data = b''
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                _, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset); offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + name_len].rstrip(b'\0')); offset += name_len
+                if mask & IN_Q_OVERFLOW: self._needs_rescan = True
+                elif mask & (IN_DELETE_SELF | IN_MOVE_SELF): print(f"Watched directory went away: {self.directory}"); self._needs_rescan = True
+                elif name and is_video_filename(name): self._dirty.add(os.path.join(self.directory, name))
+            remaining = deadline - time.monotonic()
+            if remaining <= 0: break
+            select.select([self._inotify_fd], [], [], remaining)
+
+    def _poll(self):
+        if self._inotify_fd is None:
+            try: dir_mtime_ns = os.stat(self.directory).st_mtime_ns
+            except OSError: dir_mtime_ns = None
+            if dir_mtime_ns != self._dir_mtime_ns: self._needs_rescan = True
+        with self._lock: self._dirty.update(self.recent)
+
+    def _rescan(self):
+        try: self._dir_mtime_ns = os.stat(self.directory).st_mtime_ns
+        except OSError: self._dir_mtime_ns = None
+        index = {path: (st.st_size, st.st_mtime_ns) for path, st in scan_video_entries(self.directory)}
+        with self._lock: self.index = index; self.recent = self._top_k()
+
+    def _top_k(self):
+        return [path for _, path in heapq.nlargest(self.count, ((stat[1], path) for path, stat in self.index.items()))]
+
+    def _apply_pending(self):
+        with self._lock: previous = list(self.recent)
+        if self._needs_rescan: self._needs_rescan = False; self._dirty.clear(); self._rescan()
+        elif self._dirty:
+            dirty = self._dirty; self._dirty = set()
+            updates = {}
+            for path in dirty:
+                try: st = os.stat(path); updates[path] = (st.st_size, st.st_mtime_ns)
+                except OSError: updates[path] = None
+            with self._lock:
+                rerank = False
+                for path, stat in updates.items():
+                    if stat is None:
+                        get_stability_tracker().forget(path)
+                        if self.index.pop(path, None) is not None and path in self.recent: rerank = True
+                        continue
+                    self.index[path] = stat; get_stability_tracker().observe(path, stat[0], stat[1])
+                    if path in self.recent: rerank = True
+                    else:
+                        tail = self.index.get(self.recent[-1]) if self.recent else None
+                        if len(self.recent) < self.count or tail is None or stat[1] >= tail[1]: rerank = True
+                if rerank: self.recent = self._top_k()
+        with self._lock: current = list(self.recent)
+        if current != previous:
+            try: self.on_change(self.directory, current)
+            except Exception as e: print(f"Directory watcher callback error: {e}")
@@ -1,30 +1,148 @@
 import os
-import platform
+import sys
 import subprocess
 import json
-import tkinter
+import threading
+import time
 import datetime
-import glob
+import heapq
 from dateutil import parser as date_parser
-from utils import format_size, format_time
-from constants import VIDEO_EXTENSIONS, THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT, temp_files_to_cleanup
+from utils import format_size, format_time, format_ffmpeg_timestamp, get_file_identity
+from metadata_cache import get_metadata_cache
+from file_stability import get_stability_tracker
+from tool_registry import get_tool, hidden_startupinfo
+from constants import VIDEO_EXTENSIONS, THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT, FILMSTRIP_TILE_WIDTH, FILMSTRIP_TILE_HEIGHT, temp_files_to_cleanup
 
 
 
-def get_video_metadata(file_path):
-    if not file_path or not os.path.exists(file_path): print(f"Error: File not found - {file_path}"); return None, None, None, None
+class CancelToken:
+    def __init__(self):
+        self.cancelled = False; self._processes = set(); self._lock = threading.Lock()
+
+    def attach_process(self, process):
+        with self._lock:
+            self._processes.add(process)
+            if self.cancelled: _kill_process(process)
+
+    def detach_process(self, process=None):
+        with self._lock:
+            if process is None: self._processes.clear()
+            else: self._processes.discard(process)
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            for process in self._processes: _kill_process(process)
+
+def _show_tool_error(message):
+    tk = sys.modules.get('tkinter')
+    if tk is None or getattr(tk, '_default_root', None) is None: return
+    if threading.current_thread() is not threading.main_thread(): return
+    from tkinter import messagebox
+    messagebox.showerror("Error", message)
+
+def _kill_process(process):
     try:
-        startupinfo = None
-        if platform.system() == 'Windows': startupinfo = subprocess.STARTUPINFO(); startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW; startupinfo.wShowWindow = subprocess.SW_HIDE
-        subprocess.run(['ffprobe', '-version'], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, startupinfo=startupinfo)
-    except (FileNotFoundError, subprocess.CalledProcessError): print("Error: ffprobe not found."); tkinter.messagebox.showerror("Error", "ffprobe (part of FFmpeg) not found in system PATH.\nPlease install FFmpeg and ensure it's added to PATH."); return None, None, None, None
-    command = ['ffprobe', '-v', 'quiet', '-print_format', 'json', '-show_format', '-show_streams', file_path]
+        if process.poll() is None: process.kill()
+    except OSError as e: print(f"Warning: Could not kill superseded process: {e}")
+
+def run_cancellable(command, cancel_token=None, **popen_kwargs):
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **popen_kwargs)
+    if cancel_token: cancel_token.attach_process(process)
+    try: stdout, stderr = process.communicate()
+    finally:
+        if cancel_token: cancel_token.detach_process(process)
+    if cancel_token and cancel_token.cancelled: return None
+    if process.returncode != 0: raise subprocess.CalledProcessError(process.returncode, command, stdout, stderr)
+    return stdout
+
+class FFmpegProgress:
+    def __init__(self, total_seconds=None):
+        self.total_seconds = total_seconds; self.out_time = 0.0; self.speed = None; self.bitrate_kbps = None; self.total_size = 0
+        self.fps = None; self.frame = 0; self.finished = False; self.started = time.monotonic(); self.elapsed = 0.0
+
+    def update(self, fields):
+        out_time_us = fields.get('out_time_us') or fields.get('out_time_ms')
+        if out_time_us not in (None, 'N/A'):
+            try: self.out_time = max(0.0, int(out_time_us) / 1e6)
+            except ValueError: pass
+        self.speed = _parse_progress_number(fields.get('speed'), 'x', self.speed)
+        self.bitrate_kbps = _parse_progress_number(fields.get('bitrate'), 'kbits/s', self.bitrate_kbps)
+        self.fps = _parse_progress_number(fields.get('fps'), '', self.fps)
+        try: self.total_size = int(fields.get('total_size', self.total_size))
+        except ValueError: pass
+        try: self.frame = int(fields.get('frame', self.frame))
+        except ValueError: pass
+        self.finished = fields.get('progress') == 'end'; self.elapsed = time.monotonic() - self.started
+
+    @property
+    def fraction(self):
+        if self.finished: return 1.0
+        if not self.total_seconds or self.total_seconds <= 0: return None
+        return min(1.0, self.out_time / self.total_seconds)
+
+    @property
+    def eta_seconds(self):
+        if not self.total_seconds or self.out_time <= 0 or self.elapsed <= 0: return None
+        return max(0.0, (self.total_seconds - self.out_time) * self.elapsed / self.out_time)
+
+    def describe(self):
+        parts = []
+        if self.fraction is not None: parts.append(f"{self.fraction * 100:.0f}%")
+        if self.speed: parts.append(f"{self.speed:.1f}x")
+        if self.total_size: parts.append(format_size(self.total_size))
+        if self.bitrate_kbps: parts.append(f"{self.bitrate_kbps / 1000:.1f} Mbit/s")
+        if not self.finished and self.eta_seconds is not None: parts.append(f"ETA {format_time(self.eta_seconds)}")
+        return ", ".join(parts)
+
+    def snapshot(self):
+        copy = FFmpegProgress(self.total_seconds); copy.__dict__.update(self.__dict__)
+        return copy
+
+def _parse_progress_number(value, suffix, default):
+    if value is None: return default
+    value = value.strip()
+    if suffix and value.endswith(suffix): value = value[:-len(suffix)]
+    try: return float(value)
+    except ValueError: return default
+
+def run_with_progress(command, total_seconds=None, cancel_token=None, on_progress=None, **popen_kwargs):
+    command = list(command[:-1]) + ['-progress', 'pipe:1', '-nostats', command[-1]]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **popen_kwargs)
+    if cancel_token: cancel_token.attach_process(process)
+    stderr_chunks = []; stderr_thread = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True); stderr_thread.start()
+    progress = FFmpegProgress(total_seconds); fields = {}
+    try:
+        for raw_line in process.stdout:
+            key, sep, value = raw_line.decode('utf-8', 'replace').strip().partition('=')
+            if not sep: continue
+            fields[key] = value
+            if key == 'progress':
+                progress.update(fields); fields = {}
+                if on_progress:
+                    try: on_progress(progress.snapshot())
+                    except Exception as e: print(f"Progress callback error: {e}")
+        process.wait(); stderr_thread.join()
+    finally:
+        if cancel_token: cancel_token.detach_process(process)
+        process.stdout.close(); process.stderr.close()
+    progress.elapsed = time.monotonic() - progress.started
+    if cancel_token and cancel_token.cancelled: return None
+    if process.returncode != 0: raise subprocess.CalledProcessError(process.returncode, command, None, b''.join(stderr_chunks))
+    return progress
+
+PROBE_STREAM_KEYS = ('index', 'codec_type', 'codec_name', 'profile', 'pix_fmt', 'width', 'height', 'time_base', 'r_frame_rate',
+                     'avg_frame_rate', 'start_time', 'duration', 'bit_rate', 'sample_rate', 'channels', 'channel_layout')
+
+def probe_video(file_path):
+    ffprobe = get_tool('ffprobe')
+    if not ffprobe: print("Error: ffprobe not found."); _show_tool_error("ffprobe (part of FFmpeg) not found in system PATH.\nPlease install FFmpeg and ensure it's added to PATH."); return None
+    command = [ffprobe.path, '-v', 'quiet', '-print_format', 'json', '-show_format', '-show_streams', file_path]
     try:
-        startupinfo = None
-        if platform.system() == 'Windows': startupinfo = subprocess.STARTUPINFO(); startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW; startupinfo.wShowWindow = subprocess.SW_HIDE
+        startupinfo = hidden_startupinfo()
         process = subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', startupinfo=startupinfo)
         metadata = json.loads(process.stdout)
-        duration = 0.0; creation_time_str_formatted = "N/A"; file_size_str = "N/A"; file_size_bytes = None; creation_time_tag = None
+        duration = 0.0; creation_time_str_formatted = "N/A"; file_size_bytes = None; creation_time_tag = None; bit_rate = None
         if 'format' in metadata:
             if 'duration' in metadata['format']:
                 try: duration = float(metadata['format']['duration'])
@@ -39,6 +157,9 @@ def get_video_metadata(file_path):
             if 'size' in metadata['format']:
                 try: file_size_bytes = int(metadata['format']['size'])
                 except (ValueError, TypeError): pass
+            if 'bit_rate' in metadata['format']:
+                try: bit_rate = int(metadata['format']['bit_rate'])
+                except (ValueError, TypeError): pass
         if creation_time_tag is None:
              try:
                  mtime = os.path.getmtime(file_path)
@@ -48,58 +169,151 @@ def get_video_metadata(file_path):
         if file_size_bytes is None:
             try: file_size_bytes = os.path.getsize(file_path)
             except OSError as e: print(f"Warning: Could not get file size: {e}"); file_size_bytes = None
-        if file_size_bytes is not None: file_size_str = format_size(file_size_bytes)
-        return duration, creation_time_str_formatted, file_size_str, file_size_bytes
-    except subprocess.CalledProcessError as e: print(f"ffprobe error: {e}\n{e.stderr}"); return None, None, None, None
-    except json.JSONDecodeError as e: print(f"ffprobe JSON error: {e}\n{process.stdout if hasattr(process, 'stdout') else 'No stdout'}"); return None, None, None, None
-    except Exception as e: print(f"Metadata error: {e}"); return None, None, None, None
+        streams = [{k: st[k] for k in PROBE_STREAM_KEYS if k in st} for st in metadata.get('streams', [])]
+        return {'duration': duration, 'creation_time': creation_time_str_formatted, 'size': file_size_bytes, 'bit_rate': bit_rate, 'streams': streams}
+    except subprocess.CalledProcessError as e: print(f"ffprobe error: {e}\n{e.stderr}"); return None
+    except json.JSONDecodeError as e: print(f"ffprobe JSON error: {e}\n{process.stdout if hasattr(process, 'stdout') else 'No stdout'}"); return None
+    except Exception as e: print(f"Metadata error: {e}"); return None
+
+def probe_duration(file_path, cancel_token=None):
+    ffprobe = get_tool('ffprobe')
+    if not ffprobe: print("Error: ffprobe not found."); return None
+    command = [ffprobe.path, '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1', file_path]
+    try:
+        stdout = run_cancellable(command, cancel_token, startupinfo=hidden_startupinfo())
+        return float(stdout.decode('utf-8', 'replace').strip()) if stdout else None
+    except subprocess.CalledProcessError as e: print(f"ffprobe duration error: {e}\n{e.stderr.decode('utf-8', 'replace')}"); return None
+    except ValueError: return None
+    except Exception as e: print(f"Duration probe error: {e}"); return None
+
+def get_live_record(file_path, cancel_token=None):
+    try: st = os.stat(file_path)
+    except OSError as e: print(f"Error: Could not stat live file {file_path}: {e}"); return None
+    creation_time = datetime.datetime.fromtimestamp(st.st_mtime).strftime('%m/%d/%y %H:%M')
+    return {'duration': probe_duration(file_path, cancel_token) or 0.0, 'creation_time': creation_time, 'size': st.st_size, 'bit_rate': None, 'streams': [], 'live': True}
+
+def get_video_record(file_path):
+    if not file_path or not os.path.exists(file_path): print(f"Error: File not found - {file_path}"); return None
+    identity = get_file_identity(file_path); cache = get_metadata_cache()
+    record = cache.get(identity) if identity else None
+    if record is not None: return record
+    if identity and get_stability_tracker().is_live(file_path, identity[1], identity[2]):
+        print(f"{os.path.basename(file_path)} is still being written; deferring full probe."); return get_live_record(file_path)
+    record = probe_video(file_path)
+    if record is not None and identity: cache.put(identity, record)
+    return record
+
+def get_video_time_base(record):
+    if not record: return None
+    for stream in record.get('streams', []):
+        if stream.get('codec_type') == 'video' and stream.get('time_base'): return stream['time_base']
+    return None
+
+def probe_keyframes(file_path, cancel_token=None):
+    ffprobe = get_tool('ffprobe')
+    if not ffprobe: print("Error: ffprobe not found."); return None
+    command = [ffprobe.path, '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'packet=pts_time,flags', '-of', 'csv=print_section=0', file_path]
+    try:
+        stdout = run_cancellable(command, cancel_token, startupinfo=hidden_startupinfo())
+        if stdout is None: return None
+        keyframes = set()
+        for line in stdout.decode('utf-8', 'replace').splitlines():
+            parts = line.strip().split(',')
+            if len(parts) >= 2 and 'K' in parts[1]:
+                try: keyframes.add(round(float(parts[0]), 6))
+                except ValueError: pass
+        return sorted(keyframes)
+    except subprocess.CalledProcessError as e: print(f"Keyframe probe error: {e}\n{e.stderr.decode('utf-8', 'replace')}"); return None
+    except Exception as e: print(f"Keyframe index error: {e}"); return None
+
+def get_keyframe_index(file_path, cancel_token=None):
+    identity = get_file_identity(file_path)
+    if not identity: return None
+    cache = get_metadata_cache(); record = cache.get(identity)
+    if record is not None and 'keyframes' in record: return _relative_keyframes(record['keyframes'], record)
+    if get_stability_tracker().is_live(file_path, identity[1], identity[2]): print(f"Deferring keyframe index for live file {os.path.basename(file_path)}"); return None
+    keyframes = probe_keyframes(file_path, cancel_token)
+    if keyframes is None: return None
+    print(f"Indexed {len(keyframes)} keyframes in {os.path.basename(file_path)}"); cache.update(identity, keyframes=keyframes)
+    return _relative_keyframes(keyframes, record or get_video_record(file_path))
+
+def get_video_start_time(record):
+    for stream in (record or {}).get('streams', []):
+        if stream.get('codec_type') == 'video':
+            try: return float(stream.get('start_time') or 0.0)
+            except (TypeError, ValueError): return 0.0
+    return 0.0
+
+def _relative_keyframes(keyframes, record):
+    start = get_video_start_time(record)
+    return [round(k - start, 6) for k in keyframes] if start else keyframes
+
+def get_video_metadata(file_path):
+    record = get_video_record(file_path)
+    if record is None: return None, None, None, None
+    file_size_bytes = record.get('size'); file_size_str = format_size(file_size_bytes) if file_size_bytes is not None else "N/A"
+    return record.get('duration', 0.0), record.get('creation_time', "N/A"), file_size_str, file_size_bytes
+
+VIDEO_EXTENSION_SUFFIXES = tuple(pattern.lstrip('*').lower() for pattern in VIDEO_EXTENSIONS)
+
+def is_video_filename(name):
+    return name.lower().endswith(VIDEO_EXTENSION_SUFFIXES)
+
+def scan_video_entries(directory):
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if not is_video_filename(entry.name): continue
+                try:
+                    if not entry.is_file(): continue
+                    yield entry.path, entry.stat()
+                except OSError as e: print(f"Warning: Skipping {entry.path}: {e}")
+    except OSError as e: print(f"Error scanning {directory}: {e}")
 
 def find_recent_videos(directory, count):
     if not directory or not os.path.isdir(directory): print(f"Video search dir invalid: {directory}"); return []
-    all_videos = []
-    for ext_pattern in VIDEO_EXTENSIONS:
-        all_videos.extend(glob.glob(os.path.join(directory, ext_pattern)))
-    if not all_videos: print(f"No videos found in {directory}"); return []
-    try: all_videos.sort(key=os.path.getmtime, reverse=True); return all_videos[:count]
-    except Exception as e: print(f"Error sorting videos: {e}"); return []
-
-def extract_thumbnail(video_path, time_seconds, output_path):
-    global temp_files_to_cleanup
-    if not video_path or not os.path.exists(video_path): print(f"Thumb Error: Input not found - {video_path}"); return False
+    newest = heapq.nlargest(count, ((st.st_mtime_ns, path) for path, st in scan_video_entries(directory)))
+    if not newest: print(f"No videos found in {directory}"); return []
+    return [path for _, path in newest]
+
+def list_videos_by_mtime(directory):
+    return [path for _, path in sorted(((st.st_mtime_ns, path) for path, st in scan_video_entries(directory)), reverse=True)]
+
+THUMBNAIL_FILTER = f'scale={THUMBNAIL_WIDTH}:{THUMBNAIL_HEIGHT}:force_original_aspect_ratio=increase,crop={THUMBNAIL_WIDTH}:{THUMBNAIL_HEIGHT}'
+
+def extract_thumbnail_image(video_path, time_seconds, time_base=None, cancel_token=None):
+    if not video_path or not os.path.exists(video_path): print(f"Thumb Error: Input not found - {video_path}"); return None
+    ffmpeg = get_tool('ffmpeg')
+    if not ffmpeg: print("Error: ffmpeg not found."); return None
+    frame_size = THUMBNAIL_WIDTH * THUMBNAIL_HEIGHT * 3
+    command = [ffmpeg.path, '-hide_banner', '-loglevel', 'error', '-ss', format_ffmpeg_timestamp(time_seconds, time_base), '-i', video_path,
+               '-frames:v', '1', '-an', '-sn', '-vf', THUMBNAIL_FILTER, '-f', 'rawvideo', '-pix_fmt', 'rgb24', 'pipe:1']
     try:
-        startupinfo = None
-        if platform.system() == 'Windows': startupinfo = subprocess.STARTUPINFO(); startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW; startupinfo.wShowWindow = subprocess.SW_HIDE
-        subprocess.run(['ffmpeg', '-version'], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, startupinfo=startupinfo)
-    except (FileNotFoundError, subprocess.CalledProcessError): print("Error: ffmpeg not found."); tkinter.messagebox.showerror("Error", "ffmpeg not found in system PATH.\nPlease install FFmpeg and ensure it's added to PATH."); return False
-    valid_time_seconds = max(0, time_seconds) if isinstance(time_seconds, (int, float)) else 0
-    time_str = format_time(valid_time_seconds).split('.')[0]
-    command = ['ffmpeg', '-ss', time_str, '-i', video_path, '-frames:v', '1', '-q:v', '3',
-               '-vf', f'scale={THUMBNAIL_WIDTH}:-1:force_original_aspect_ratio=decrease,crop={THUMBNAIL_WIDTH}:{THUMBNAIL_HEIGHT}',
-               '-y', output_path]
+        stdout = run_cancellable(command, cancel_token, startupinfo=hidden_startupinfo())
+        if stdout is None: return None
+        if len(stdout) < frame_size: print(f"Error extracting thumbnail: got {len(stdout)} of {frame_size} bytes. Command: {' '.join(command)}"); return None
+        from PIL import Image
+        return Image.frombytes('RGB', (THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT), stdout[:frame_size])
+    except subprocess.CalledProcessError as e: print(f"Error extracting thumbnail: {e}\nStderr: {e.stderr.decode('utf-8', 'replace')}\nCommand: {' '.join(command)}"); return None
+    except Exception as e: print(f"An unexpected error during thumbnail extraction: {e}\nCommand: {' '.join(command)}"); return None
+
+def extract_filmstrip_image(video_path, duration, frame_count, cancel_token=None):
+    if not video_path or not os.path.exists(video_path) or not duration or duration <= 0 or frame_count < 1: return None
+    ffmpeg = get_tool('ffmpeg')
+    if not ffmpeg: print("Error: ffmpeg not found."); return None
+    strip_width = FILMSTRIP_TILE_WIDTH * frame_count; frame_size = strip_width * FILMSTRIP_TILE_HEIGHT * 3
+    video_filter = (f'fps={frame_count / duration:.9g},scale={FILMSTRIP_TILE_WIDTH}:{FILMSTRIP_TILE_HEIGHT}:force_original_aspect_ratio=increase,'
+                    f'crop={FILMSTRIP_TILE_WIDTH}:{FILMSTRIP_TILE_HEIGHT},tile={frame_count}x1')
+    command = [ffmpeg.path, '-hide_banner', '-loglevel', 'error', '-skip_frame', 'nokey', '-i', video_path, '-an', '-sn',
+               '-vf', video_filter, '-frames:v', '1', '-f', 'rawvideo', '-pix_fmt', 'rgb24', 'pipe:1']
     try:
-        startupinfo = None
-        if platform.system() == 'Windows': startupinfo = subprocess.STARTUPINFO(); startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW; startupinfo.wShowWindow = subprocess.SW_HIDE
-        process = subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', startupinfo=startupinfo)
-        if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-            if output_path not in temp_files_to_cleanup:
-                temp_files_to_cleanup.append(output_path)
-            return True
-        else:
-            print(f"Error extracting thumbnail: Output file not created or empty. Command: {' '.join(command)}")
-            if os.path.exists(output_path): os.remove(output_path)
-            return False
-    except subprocess.CalledProcessError as e:
-        print(f"Error extracting thumbnail: {e}\nStderr: {e.stderr}\nCommand: {' '.join(command)}")
-        if os.path.exists(output_path):
-            try: os.remove(output_path)
-            except OSError: pass
-        return False
-    except Exception as e:
-        print(f"An unexpected error during thumbnail extraction: {e}\nCommand: {' '.join(command)}")
-        if os.path.exists(output_path):
-            try: os.remove(output_path)
-            except OSError: pass
-        return False
+        stdout = run_cancellable(command, cancel_token, startupinfo=hidden_startupinfo())
+        if stdout is None: return None
+        if len(stdout) < frame_size: print(f"Error extracting filmstrip: got {len(stdout)} of {frame_size} bytes. Command: {' '.join(command)}"); return None
+        from PIL import Image
+        return Image.frombytes('RGB', (strip_width, FILMSTRIP_TILE_HEIGHT), stdout[:frame_size])
+    except subprocess.CalledProcessError as e: print(f"Error extracting filmstrip: {e}\nStderr: {e.stderr.decode('utf-8', 'replace')}\nCommand: {' '.join(command)}"); return None
+    except Exception as e: print(f"An unexpected error during filmstrip extraction: {e}\nCommand: {' '.join(command)}"); return None
 
 def cleanup_temp_files():
     global temp_files_to_cleanup
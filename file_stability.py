@@ -0,0 +1,43 @@
+import os
+import time
+import threading
+from constants import FILE_SETTLE_SECONDS
+
+LIVE = "live"
+SETTLED = "settled"
+
+class FileStabilityTracker:
+    def __init__(self, settle_seconds=FILE_SETTLE_SECONDS):
+        self.settle_seconds = settle_seconds
+        self._samples = {}; self._lock = threading.Lock()
+
+    def observe(self, path, size=None, mtime_ns=None):
+        if size is None or mtime_ns is None:
+            try: st = os.stat(path); size = st.st_size; mtime_ns = st.st_mtime_ns
+            except OSError:
+                with self._lock: self._samples.pop(path, None)
+                return None
+        now = time.monotonic()
+        with self._lock:
+            sample = self._samples.get(path)
+            if sample is None:
+                age = max(0.0, time.time() - mtime_ns / 1e9)
+                last_change = now - age if age < self.settle_seconds else now - self.settle_seconds
+                self._samples[path] = (size, mtime_ns, last_change)
+            elif sample[0] != size or sample[1] != mtime_ns: self._samples[path] = (size, mtime_ns, now)
+            return LIVE if now - self._samples[path][2] < self.settle_seconds else SETTLED
+
+    def is_live(self, path, size=None, mtime_ns=None):
+        return self.observe(path, size, mtime_ns) == LIVE
+
+    def forget(self, path):
+        with self._lock: self._samples.pop(path, None)
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+def get_stability_tracker():
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None: _tracker = FileStabilityTracker()
+        return _tracker
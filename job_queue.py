@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from ffmpeg_utils import CancelToken, get_video_record
+from trim_engine import trim_video, trim_segments, TrimError, TrimCancelled
+from utils import get_app_file_path, get_volume_root
+from preflight import run_preflight
+from config_store import get_config_store
+from constants import JOB_QUEUE_FILENAME, JOB_QUEUE_COPY_WORKERS, JOB_QUEUE_REENCODE_WORKERS, JOB_QUEUE_SAVE_DELAY_S, JOB_QUEUE_PROGRESS_NOTIFY_S, TRIM_MODE_COPY, TRIM_MODE_REENCODE, TRIM_MODES
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+QUEUE_FORMAT_VERSION = 1
+
+class TrimJob:
+    FIELDS = ('id', 'source', 'start', 'end', 'output_directory', 'custom_name', 'mode', 'time_base', 'status', 'output_path', 'error', 'created', 'started', 'finished', 'progress', 'segments', 'join', 'estimated_bytes')
+
+    def __init__(self, source, start, end, output_directory, custom_name=None, mode=TRIM_MODE_COPY, time_base=None, **state):
+        self.source = source; self.start = float(start); self.end = float(end); self.output_directory = output_directory
+        self.custom_name = custom_name; self.mode = mode; self.time_base = str(time_base) if time_base else None
+        self.id = state.get('id') or uuid.uuid4().hex[:12]; self.status = state.get('status', PENDING)
+        self.output_path = state.get('output_path'); self.error = state.get('error')
+        self.created = state.get('created') or time.time(); self.started = state.get('started'); self.finished = state.get('finished'); self.progress = state.get('progress')
+        self.segments = [list(seg) for seg in state.get('segments') or []]; self.join = bool(state.get('join')); self.estimated_bytes = state.get('estimated_bytes')
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        return cls(data.pop('source'), data.pop('start'), data.pop('end'), data.pop('output_directory'), data.pop('custom_name', None),
+                   data.pop('mode', TRIM_MODE_COPY), data.pop('time_base', None), **data)
+
+class JobQueue:
+    def __init__(self, queue_path, copy_workers=JOB_QUEUE_COPY_WORKERS, reencode_workers=JOB_QUEUE_REENCODE_WORKERS):
+        self.queue_path = queue_path
+        self._jobs = OrderedDict(); self._tokens = {}; self._listeners = []; self._closing = False; self._last_progress_notify = {}; self._written_bytes = {}
+        self._lock = threading.Lock(); self._io_lock = threading.Lock(); self._save_timer = None; self._dirty = False
+        self._executors = {TRIM_MODE_COPY: ThreadPoolExecutor(max_workers=max(1, copy_workers), thread_name_prefix="trimmy-job-copy"),
+                           TRIM_MODE_REENCODE: ThreadPoolExecutor(max_workers=max(1, reencode_workers), thread_name_prefix="trimmy-job-encode")}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.queue_path): return
+        try:
+            with open(self.queue_path, 'r', encoding='utf-8') as f: data = json.load(f)
+            if data.get('version') != QUEUE_FORMAT_VERSION: print("Job queue format changed, starting fresh."); return
+            for item in data.get('jobs', []):
+                job = TrimJob.from_dict(item)
+                if job.status == RUNNING: job.status = PENDING; job.started = None
+                self._jobs[job.id] = job
+            print(f"Loaded {len(self._jobs)} queued job(s).")
+        except (json.JSONDecodeError, IOError, ValueError, TypeError, KeyError) as e: print(f"Warning: Could not load job queue ({self.queue_path}): {e}"); self._jobs.clear()
+
+    def start(self):
+        with self._lock: pending = [job for job in self._jobs.values() if job.status == PENDING]
+        for job in pending: self._submit(job)
+        if pending: print(f"Resuming {len(pending)} pending job(s).")
+        return self
+
+    def add_listener(self, listener):
+        with self._lock: self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        with self._lock:
+            if listener in self._listeners: self._listeners.remove(listener)
+
+    def add(self, source, start, end, output_directory, custom_name=None, mode=TRIM_MODE_COPY, time_base=None, segments=None, join=False, estimated_bytes=None):
+        if mode not in TRIM_MODES: raise TrimError(f"Unknown trim mode: {mode}")
+        job = TrimJob(source, start, end, output_directory, custom_name, mode, time_base, segments=segments, join=join, estimated_bytes=estimated_bytes)
+        with self._lock: self._jobs[job.id] = job; self._dirty = True
+        self._schedule_save(); self._submit(job); self._notify(job)
+        return job
+
+    def cancel(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED_STATES: return False
+            if job.status == PENDING: job.status = CANCELLED; job.finished = time.time(); self._dirty = True
+            token = self._tokens.get(job_id)
+        if token: token.cancel()
+        self._schedule_save(); self._notify(job)
+        return True
+
+    def clear_finished(self):
+        with self._lock:
+            for job_id in [job.id for job in self._jobs.values() if job.status in FINISHED_STATES]: del self._jobs[job_id]
+            self._dirty = True
+        self._schedule_save(); self._notify(None)
+
+    def jobs(self):
+        with self._lock: return [TrimJob.from_dict(job.to_dict()) for job in self._jobs.values()]
+
+    def counts(self):
+        counts = {}
+        with self._lock:
+            for job in self._jobs.values(): counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    def has_active_jobs_for(self, source):
+        source = os.path.normcase(os.path.abspath(source))
+        with self._lock: return any(job.status in (PENDING, RUNNING) and os.path.normcase(os.path.abspath(job.source)) == source for job in self._jobs.values())
+
+    def reserved_bytes(self, output_directory):
+        volume = get_volume_root(output_directory)
+        with self._lock:
+            jobs = [(job.output_directory, max(0, job.estimated_bytes - self._written_bytes.get(job.id, 0)))
+                    for job in self._jobs.values() if job.status in (PENDING, RUNNING) and job.estimated_bytes]
+        return sum(remaining for output_directory, remaining in jobs if get_volume_root(output_directory) == volume)
+
+    def _submit(self, job):
+        token = CancelToken()
+        with self._lock: self._tokens[job.id] = token
+        self._executors[TRIM_MODE_COPY if job.mode == TRIM_MODE_COPY else TRIM_MODE_REENCODE].submit(self._run_job, job, token)
+
+    def _run_job(self, job, token):
+        with self._lock:
+            if job.status != PENDING or token.cancelled or self._closing: self._tokens.pop(job.id, None); return
+            job.status = RUNNING; job.started = time.time(); self._dirty = True
+        self._schedule_save(); self._notify(job)
+        print(f"Job {job.id} started: {os.path.basename(job.source)} [{job.mode}]")
+        status = DONE; output_path = None; error = None
+        try:
+            media_seconds = sum(b - a for a, b in job.segments) if job.segments else job.end - job.start
+            preflight = run_preflight(job.source, media_seconds, job.output_directory, job.mode, get_video_record(job.source),
+                                      max(0, self.reserved_bytes(job.output_directory) - (job.estimated_bytes or 0)))
+            if not preflight.enough_space: raise TrimError(f"Not enough disk space: {preflight.describe()}")
+            on_progress = lambda progress: self._on_job_progress(job, progress)
+            if job.segments: result = trim_segments(job.source, job.segments, job.output_directory, job.join, job.custom_name, False, job.time_base, token, job.mode, on_progress)
+            else: result = trim_video(job.source, job.start, job.end, job.output_directory, job.custom_name, False, job.time_base, token, mode=job.mode, on_progress=on_progress)
+            output_path = result.output_path if len(result.output_paths) == 1 else f"{len(result.output_paths)} files, first: {result.output_path}"; error = result.warning
+        except TrimCancelled: status = CANCELLED
+        except TrimError as e: status = FAILED; error = str(e)
+        except Exception as e: status = FAILED; error = f"Unexpected error: {e}"
+        with self._lock:
+            self._tokens.pop(job.id, None); self._last_progress_notify.pop(job.id, None); self._written_bytes.pop(job.id, None)
+            if self._closing and status == CANCELLED: return
+            job.status = status; job.output_path = output_path; job.error = error; job.finished = time.time(); job.progress = None; self._dirty = True
+        print(f"Job {job.id} {status}" + (f": {error}" if error else f" in {job.finished - job.started:.1f}s -> {output_path}"))
+        self._schedule_save(); self._notify(job)
+
+    def _on_job_progress(self, job, progress):
+        now = time.monotonic()
+        with self._lock:
+            job.progress = progress.describe(); self._written_bytes[job.id] = progress.total_size
+            if now - self._last_progress_notify.get(job.id, 0.0) < JOB_QUEUE_PROGRESS_NOTIFY_S: return
+            self._last_progress_notify[job.id] = now
+        self._notify(job)
+
+    def _notify(self, job):
+        with self._lock: listeners = list(self._listeners)
+        for listener in listeners:
+            try: listener(job)
+            except Exception as e: print(f"Job queue listener error: {e}")
+
+    def _schedule_save(self):
+        with self._lock:
+            if self._save_timer or self._closing: return
+            self._save_timer = threading.Timer(JOB_QUEUE_SAVE_DELAY_S, self.flush); self._save_timer.daemon = True; self._save_timer.start()
+
+    def flush(self):
+        with self._io_lock:
+            with self._lock:
+                if self._save_timer: self._save_timer.cancel(); self._save_timer = None
+                if not self._dirty: return
+                payload = json.dumps({'version': QUEUE_FORMAT_VERSION, 'jobs': [job.to_dict() for job in self._jobs.values()]}, indent=1); self._dirty = False
+            tmp_path = f"{self.queue_path}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f: f.write(payload)
+                os.replace(tmp_path, self.queue_path)
+            except OSError as e:
+                print(f"Warning: Could not save job queue: {e}")
+                with self._lock: self._dirty = True
+                try: os.remove(tmp_path)
+                except OSError: pass
+
+    def shutdown(self):
+        with self._lock: self._closing = True; tokens = list(self._tokens.values())
+        for token in tokens: token.cancel()
+        for executor in self._executors.values(): executor.shutdown(wait=False, cancel_futures=True)
+        self.flush()
+
+_queue = None
+_queue_lock = threading.Lock()
+
+def _worker_setting(store, key, default):
+    value = store.get(key, default)
+    try: return max(1, int(value))
+    except (TypeError, ValueError): print(f"Warning: Invalid {key} in config ({value!r}); using {default}."); return default
+
+def get_job_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            store = get_config_store()
+            _queue = JobQueue(get_app_file_path(JOB_QUEUE_FILENAME), _worker_setting(store, "queue_copy_workers", JOB_QUEUE_COPY_WORKERS),
+                              _worker_setting(store, "queue_reencode_workers", JOB_QUEUE_REENCODE_WORKERS))
+        return _queue
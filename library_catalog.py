@@ -0,0 +1,128 @@
+import os
+import sqlite3
+import threading
+from ffmpeg_utils import is_video_filename
+from utils import get_app_file_path
+from constants import LIBRARY_DB_FILENAME
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, parent TEXT, mtime_ns INTEGER);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs(parent);
+CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, dir TEXT NOT NULL, name TEXT NOT NULL, size INTEGER, mtime_ns INTEGER,
+                                  duration REAL, codec TEXT, width INTEGER, height INTEGER);
+CREATE INDEX IF NOT EXISTS files_dir ON files(dir);
+CREATE INDEX IF NOT EXISTS files_mtime ON files(mtime_ns);
+"""
+
+def _escape_like(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def _like_prefix(path):
+    return _escape_like(path if path.endswith(os.sep) else path + os.sep) + '%'
+
+class LibraryCatalog:
+    def __init__(self, db_path):
+        self.db_path = db_path; self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL"); self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA); self._conn.commit()
+
+    def scan(self, root, cancel_token=None):
+        root = os.path.normpath(root); stack = [root]; listed = 0; skipped = 0; listed_dirs = set()
+        while stack:
+            if cancel_token and cancel_token.cancelled: print("Library scan cancelled."); break
+            directory = stack.pop()
+            try: mtime_ns = os.stat(directory).st_mtime_ns
+            except FileNotFoundError:
+                if directory == root: print(f"Library root not found, scan aborted: {root}"); return
+                if os.path.dirname(directory) in listed_dirs: self._remove_tree(directory)
+                continue
+            except OSError as e:
+                if directory == root: print(f"Library root unavailable, scan aborted: {root}: {e}"); return
+                print(f"Warning: Skipping unreachable {directory}: {e}"); continue
+            with self._lock: row = self._conn.execute("SELECT mtime_ns FROM dirs WHERE path=?", (directory,)).fetchone()
+            if row and row[0] == mtime_ns:
+                skipped += 1
+                with self._lock: children = [r[0] for r in self._conn.execute("SELECT path FROM dirs WHERE parent=?", (directory,))]
+                stack.extend(children); continue
+            listing = self._list_directory(directory)
+            if listing is None:
+                if directory == root: print(f"Library root could not be listed, scan aborted: {root}"); return
+                continue
+            listed += 1; listed_dirs.add(directory); subdirs, videos = listing
+            self._store_directory(directory, mtime_ns, subdirs, videos)
+            stack.extend(subdirs)
+        print(f"Library scan of {root}: {listed} dir(s) listed, {skipped} unchanged dir(s) skipped.")
+
+    def _list_directory(self, directory):
+        subdirs = []; videos = {}
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False): subdirs.append(entry.path)
+                        elif is_video_filename(entry.name) and entry.is_file():
+                            st = entry.stat(); videos[entry.path] = (entry.name, st.st_size, st.st_mtime_ns)
+                    except OSError as e: print(f"Warning: Skipping {entry.path}: {e}")
+        except OSError as e: print(f"Error listing {directory}: {e}"); return None
+        return subdirs, videos
+
+    def _store_directory(self, directory, mtime_ns, subdirs, videos):
+        with self._lock, self._conn:
+            known_dirs = {r[0] for r in self._conn.execute("SELECT path FROM dirs WHERE parent=?", (directory,))}
+            for gone in known_dirs - set(subdirs): self._remove_tree_locked(gone)
+            known_files = {r[0]: (r[1], r[2]) for r in self._conn.execute("SELECT path, size, mtime_ns FROM files WHERE dir=?", (directory,))}
+            self._conn.executemany("DELETE FROM files WHERE path=?", [(p,) for p in known_files.keys() - videos.keys()])
+            changed = [(p, directory, name, size, mtime) for p, (name, size, mtime) in videos.items() if known_files.get(p) != (size, mtime)]
+            self._conn.executemany("INSERT OR REPLACE INTO files (path, dir, name, size, mtime_ns) VALUES (?, ?, ?, ?, ?)", changed)
+            self._conn.execute("INSERT OR REPLACE INTO dirs (path, parent, mtime_ns) VALUES (?, ?, ?)", (directory, os.path.dirname(directory), mtime_ns))
+
+    def _remove_tree(self, directory):
+        with self._lock, self._conn: self._remove_tree_locked(directory)
+
+    def _remove_tree_locked(self, directory):
+        prefix = _like_prefix(directory)
+        self._conn.execute("DELETE FROM files WHERE dir=? OR dir LIKE ? ESCAPE '\\'", (directory, prefix))
+        self._conn.execute("DELETE FROM dirs WHERE path=? OR path LIKE ? ESCAPE '\\'", (directory, prefix))
+
+    def recent(self, root, count, offset=0):
+        root = os.path.normpath(root)
+        with self._lock:
+            rows = self._conn.execute("SELECT path FROM files WHERE dir=? OR dir LIKE ? ESCAPE '\\' ORDER BY mtime_ns DESC LIMIT ? OFFSET ?",
+                                      (root, _like_prefix(root), count, offset)).fetchall()
+        return [r[0] for r in rows]
+
+    def count(self, root):
+        root = os.path.normpath(root)
+        with self._lock: return self._conn.execute("SELECT COUNT(*) FROM files WHERE dir=? OR dir LIKE ? ESCAPE '\\'", (root, _like_prefix(root))).fetchone()[0]
+
+    def search(self, root, term, limit=100):
+        root = os.path.normpath(root); pattern = '%' + _escape_like(term) + '%'
+        with self._lock:
+            rows = self._conn.execute("SELECT path FROM files WHERE (dir=? OR dir LIKE ? ESCAPE '\\') AND name LIKE ? ESCAPE '\\' ORDER BY mtime_ns DESC LIMIT ?",
+                                      (root, _like_prefix(root), pattern, limit)).fetchall()
+        return [r[0] for r in rows]
+
+    def get_entry(self, path):
+        with self._lock:
+            row = self._conn.execute("SELECT size, mtime_ns, duration, codec, width, height FROM files WHERE path=?", (path,)).fetchone()
+        if not row: return None
+        return {'size': row[0], 'mtime_ns': row[1], 'duration': row[2], 'codec': row[3], 'width': row[4], 'height': row[5]}
+
+    def update_media_info(self, path, record):
+        video = next((s for s in record.get('streams', []) if s.get('codec_type') == 'video'), {})
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE files SET duration=?, codec=?, width=?, height=? WHERE path=?",
+                               (record.get('duration'), video.get('codec_name'), video.get('width'), video.get('height'), path))
+
+    def close(self):
+        with self._lock: self._conn.close()
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+def get_library_catalog():
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None: _catalog = LibraryCatalog(get_app_file_path(LIBRARY_DB_FILENAME))
+        return _catalog
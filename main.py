@@ -1,20 +1,17 @@
 import sys
 import tkinter
-import subprocess
-import platform
 import customtkinter
-from utils import load_last_directory
+from config_store import load_last_directory
 from app import VideoTrimmerApp
 from ffmpeg_utils import cleanup_temp_files
+from tool_registry import get_tool
 
 if __name__ == "__main__":
     try:
-        si_check = None
-        if platform.system() == 'Windows': si_check = subprocess.STARTUPINFO(); si_check.dwFlags |= subprocess.STARTF_USESHOWWINDOW; si_check.wShowWindow = subprocess.SW_HIDE
-        subprocess.run(['ffmpeg', '-version'], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, startupinfo=si_check)
-        subprocess.run(['ffprobe', '-version'], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, startupinfo=si_check)
+        missing = [name for name in ('ffmpeg', 'ffprobe') if not get_tool(name)]
+        if missing: raise FileNotFoundError(f"{', '.join(missing)} not found in PATH")
         print("FFmpeg and ffprobe found.")
-    except (FileNotFoundError, subprocess.CalledProcessError) as e:
+    except FileNotFoundError as e:
         err_msg = f"ERROR: FFmpeg/ffprobe not found/executable.\nEnsure installed and in PATH.\nDetails: {e}"
         print(err_msg); r_err = tkinter.Tk(); r_err.withdraw(); tkinter.messagebox.showerror("Startup Error", err_msg, parent=r_err); r_err.destroy(); sys.exit(1)
     except Exception as e:
@@ -0,0 +1,81 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+from utils import get_app_file_path
+from constants import METADATA_CACHE_FILENAME, METADATA_CACHE_MAX_ENTRIES, METADATA_CACHE_SAVE_DELAY_S
+
+CACHE_FORMAT_VERSION = 1
+
+class MetadataCache:
+    def __init__(self, cache_path, max_entries=METADATA_CACHE_MAX_ENTRIES):
+        self.cache_path = cache_path; self.max_entries = max_entries
+        self._entries = OrderedDict(); self._lock = threading.Lock(); self._io_lock = threading.Lock(); self._save_timer = None; self._dirty = False
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.cache_path): return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f: data = json.load(f)
+            if data.get('version') != CACHE_FORMAT_VERSION: print("Metadata cache format changed, starting fresh."); return
+            for path, size, mtime_ns, record in data.get('entries', []): self._entries[path] = (size, mtime_ns, record)
+            while len(self._entries) > self.max_entries: self._entries.popitem(last=False)
+            print(f"Loaded {len(self._entries)} cached metadata entries.")
+        except (json.JSONDecodeError, IOError, ValueError, TypeError) as e: print(f"Warning: Could not load metadata cache ({self.cache_path}): {e}"); self._entries.clear()
+
+    def get(self, identity):
+        path, size, mtime_ns = identity
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None: return None
+            if entry[0] != size or entry[1] != mtime_ns: del self._entries[path]; self._dirty = True; return None
+            self._entries.move_to_end(path)
+            return entry[2]
+
+    def put(self, identity, record):
+        path, size, mtime_ns = identity
+        with self._lock:
+            self._entries[path] = (size, mtime_ns, record); self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries: self._entries.popitem(last=False)
+            self._dirty = True
+        self._schedule_save()
+
+    def update(self, identity, **fields):
+        path, size, mtime_ns = identity
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry[0] != size or entry[1] != mtime_ns: return False
+            entry[2].update(fields); self._dirty = True
+        self._schedule_save(); return True
+
+    def _schedule_save(self):
+        with self._lock:
+            if self._save_timer: return
+            self._save_timer = threading.Timer(METADATA_CACHE_SAVE_DELAY_S, self.flush); self._save_timer.daemon = True; self._save_timer.start()
+
+    def flush(self):
+        with self._io_lock:
+            with self._lock:
+                if self._save_timer: self._save_timer.cancel(); self._save_timer = None
+                if not self._dirty: return
+                try: payload = json.dumps({'version': CACHE_FORMAT_VERSION, 'entries': [[p, s, m, r] for p, (s, m, r) in self._entries.items()]}, separators=(',', ':'))
+                except (TypeError, ValueError) as e: print(f"Warning: Could not serialize metadata cache: {e}"); return
+                self._dirty = False
+            tmp_path = f"{self.cache_path}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f: f.write(payload)
+                os.replace(tmp_path, self.cache_path)
+            except OSError as e:
+                print(f"Warning: Could not save metadata cache: {e}")
+                with self._lock: self._dirty = True
+                try: os.remove(tmp_path)
+                except OSError: pass
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_metadata_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None: _cache = MetadataCache(get_app_file_path(METADATA_CACHE_FILENAME))
+        return _cache
@@ -0,0 +1,75 @@
+import os
+import time
+import threading
+from constants import PATH_CHECK_TTL_S, PATH_CHECK_TIMEOUT_S, PATH_CHECK_FAILED_TTL_S
+
+AVAILABLE = "available"
+UNAVAILABLE = "unavailable"
+CHECKING = "checking"
+
+class PathAvailability:
+    def __init__(self, ttl=PATH_CHECK_TTL_S, timeout=PATH_CHECK_TIMEOUT_S, failed_ttl=PATH_CHECK_FAILED_TTL_S):
+        self.ttl = ttl; self.timeout = timeout; self.failed_ttl = failed_ttl
+        self._results = {}; self._pending = {}; self._lock = threading.Lock()
+
+    def status(self, path):
+        if not path: return UNAVAILABLE
+        path = os.path.normpath(path)
+        with self._lock:
+            result = self._results.get(path)
+            if result and time.monotonic() < result[1]: return result[0]
+            return CHECKING if path in self._pending else None
+
+    def check(self, path, callback=None):
+        if not path: return UNAVAILABLE
+        path = os.path.normpath(path)
+        with self._lock:
+            result = self._results.get(path)
+            if result and time.monotonic() < result[1]: return result[0]
+            if path in self._pending:
+                if callback: self._pending[path].append(callback)
+                return CHECKING
+            self._pending[path] = [callback] if callback else []
+        threading.Thread(target=self._check_worker, args=(path,), name="trimmy-pathcheck", daemon=True).start()
+        watchdog = threading.Timer(self.timeout, self._on_timeout, args=(path,)); watchdog.daemon = True; watchdog.start()
+        return CHECKING
+
+    def is_available(self, path, timeout=None):
+        done = threading.Event(); state = self.check(path, lambda p, s: done.set())
+        if state != CHECKING: return state == AVAILABLE
+        done.wait(self.timeout if timeout is None else timeout)
+        return self.status(path) == AVAILABLE
+
+    def invalidate(self, path=None):
+        with self._lock:
+            if path is None: self._results.clear()
+            else: self._results.pop(os.path.normpath(path), None)
+
+    def _check_worker(self, path):
+        started = time.monotonic()
+        try: available = os.path.isdir(path)
+        except OSError: available = False
+        elapsed = time.monotonic() - started
+        if elapsed > self.timeout: print(f"Path check for {path} took {elapsed:.1f}s.")
+        self._finish(path, AVAILABLE if available else UNAVAILABLE)
+
+    def _on_timeout(self, path):
+        with self._lock: timed_out = path in self._pending
+        if timed_out: print(f"Path check for {path} timed out after {self.timeout:.1f}s; treating it as unavailable."); self._finish(path, UNAVAILABLE)
+
+    def _finish(self, path, state):
+        with self._lock:
+            self._results[path] = (state, time.monotonic() + (self.ttl if state == AVAILABLE else self.failed_ttl))
+            callbacks = self._pending.pop(path, [])
+        for callback in callbacks:
+            try: callback(path, state)
+            except Exception as e: print(f"Path availability callback error: {e}")
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_path_availability():
+    global _service
+    with _service_lock:
+        if _service is None: _service = PathAvailability()
+        return _service
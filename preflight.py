@@ -0,0 +1,73 @@
+import shutil
+import threading
+from utils import format_size, format_time, get_volume_root
+from trim_metrics import get_trim_metrics
+from constants import TRIM_MODE_COPY, TRIM_MODE_REENCODE, REENCODE_AUDIO_BITRATE, PREFLIGHT_SIZE_MARGIN, PREFLIGHT_MIN_FREE_BYTES, PREFLIGHT_HISTORY_SAMPLES
+
+class PreflightResult:
+    def __init__(self, media_seconds, estimated_bytes, free_bytes, reserved_bytes, estimated_seconds, samples):
+        self.media_seconds = media_seconds; self.estimated_bytes = estimated_bytes; self.free_bytes = free_bytes
+        self.reserved_bytes = reserved_bytes; self.estimated_seconds = estimated_seconds; self.samples = samples
+
+    @property
+    def required_bytes(self):
+        return (self.estimated_bytes or 0) + self.reserved_bytes + PREFLIGHT_MIN_FREE_BYTES
+
+    @property
+    def enough_space(self):
+        return self.free_bytes is None or self.estimated_bytes is None or self.free_bytes >= self.required_bytes
+
+    def describe(self):
+        parts = [f"~{format_size(self.estimated_bytes)} output" if self.estimated_bytes is not None else "output size unknown"]
+        if self.free_bytes is not None: parts.append(f"{format_size(self.free_bytes)} free" + (f" ({format_size(self.reserved_bytes)} queued)" if self.reserved_bytes else ""))
+        if self.estimated_seconds is not None: parts.append(f"{'~' + format_time(self.estimated_seconds) if self.estimated_seconds >= 1 else '<1s'} (from {self.samples} past trim{'s' if self.samples != 1 else ''})")
+        return ", ".join(parts)
+
+def _bit_rate(value):
+    try: return int(value) if value not in (None, 'N/A') else None
+    except (TypeError, ValueError): return None
+
+def estimate_output_bytes(record, media_seconds, mode=TRIM_MODE_COPY):
+    if not record or media_seconds <= 0: return None
+    streams = [st for st in record.get('streams', []) if st.get('codec_type') in ('video', 'audio')]
+    rates = [_bit_rate(st.get('bit_rate')) for st in streams]
+    if streams and all(rates): source_rate = sum(rates)
+    else:
+        source_rate = _bit_rate(record.get('bit_rate'))
+        if not source_rate and record.get('size') and record.get('duration'): source_rate = record['size'] * 8 / record['duration']
+    if not source_rate: return None
+    if mode == TRIM_MODE_REENCODE:
+        audio_count = sum(1 for st in streams if st.get('codec_type') == 'audio')
+        video_rate = sum(rate for st, rate in zip(streams, rates) if st.get('codec_type') == 'video' and rate) or source_rate
+        source_rate = video_rate + audio_count * REENCODE_AUDIO_BITRATE
+    return int(source_rate * media_seconds / 8 * PREFLIGHT_SIZE_MARGIN)
+
+def _disk_free(directory):
+    try: return shutil.disk_usage(directory).free
+    except OSError as e: print(f"Warning: Could not read free space for {directory}: {e}"); return None
+
+def free_disk_bytes(directory, timeout=None):
+    if timeout is None: return _disk_free(directory)
+    result = []; done = threading.Event()
+    threading.Thread(target=lambda: (result.append(_disk_free(directory)), done.set()), name="trimmy-diskfree", daemon=True).start()
+    if done.wait(timeout): return result[0]
+    print(f"Warning: Free space check for {directory} timed out after {timeout:.1f}s."); return None
+
+def estimate_runtime(source, output_directory, media_seconds, estimated_bytes, mode=TRIM_MODE_COPY):
+    entries = [e for e in get_trim_metrics().load() if e.get('mode') == mode and e.get('wall_seconds')]
+    input_volume = get_volume_root(source); output_volume = get_volume_root(output_directory)
+    history = [e for e in entries if e.get('input_volume') == input_volume and e.get('output_volume') == output_volume] or \
+              [e for e in entries if e.get('output_volume') == output_volume] or entries
+    history = history[-PREFLIGHT_HISTORY_SAMPLES:]
+    if not history: return None, 0
+    wall = sum(e['wall_seconds'] for e in history)
+    if mode == TRIM_MODE_COPY and estimated_bytes:
+        output_bytes = sum(e.get('output_bytes') or 0 for e in history)
+        if output_bytes > 0: return estimated_bytes * wall / output_bytes, len(history)
+    media = sum(e.get('media_seconds') or 0 for e in history)
+    return (media_seconds * wall / media, len(history)) if media > 0 else (None, 0)
+
+def run_preflight(source, media_seconds, output_directory, mode=TRIM_MODE_COPY, record=None, reserved_bytes=0, timeout=None):
+    estimated_bytes = estimate_output_bytes(record, media_seconds, mode)
+    estimated_seconds, samples = estimate_runtime(source, output_directory, media_seconds, estimated_bytes, mode)
+    return PreflightResult(media_seconds, estimated_bytes, free_disk_bytes(output_directory, timeout), reserved_bytes, estimated_seconds, samples)
@@ -0,0 +1,101 @@
+import os
+import json
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+from utils import get_app_file_path
+from constants import REPLACE_JOURNAL_FILENAME
+
+ENCODING = "encoding"
+ENCODED = "encoded"
+REPLACED = "replaced"
+
+def process_alive(pid):
+    if not isinstance(pid, int) or pid <= 0: return False
+    if os.name == 'nt':
+        import ctypes
+        kernel32 = ctypes.windll.kernel32; handle = kernel32.OpenProcess(0x1000, False, pid)
+        if not handle: return False
+        try:
+            exit_code = ctypes.c_ulong()
+            return bool(kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))) and exit_code.value == 259
+        finally: kernel32.CloseHandle(handle)
+    try: os.kill(pid, 0)
+    except ProcessLookupError: return False
+    except PermissionError: return True
+    except OSError: return False
+    return True
+
+class ReplaceJournal:
+    def __init__(self, journal_path):
+        self.journal_path = journal_path; self._lock = threading.Lock(); self._owned = set()
+
+    @contextmanager
+    def _file_lock(self):
+        with self._lock, open(f"{self.journal_path}.lock", 'a+b') as lock_file:
+            if os.name == 'nt':
+                import msvcrt
+                lock_file.seek(0); msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                try: yield
+                finally: lock_file.seek(0); msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try: yield
+                finally: fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _read(self):
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f: data = json.load(f)
+            return {entry['id']: entry for entry in data.get('entries', []) if isinstance(entry, dict) and entry.get('id')}
+        except FileNotFoundError: return {}
+        except (OSError, ValueError, AttributeError) as e: print(f"Warning: Could not read replace journal ({self.journal_path}): {e}"); return {}
+
+    def begin(self, source, temp_path, final_path):
+        entry = {'id': uuid.uuid4().hex[:12], 'source': source, 'temp': temp_path, 'final': final_path, 'state': ENCODING, 'size': None,
+                 'time': time.time(), 'pid': os.getpid()}
+        with self._file_lock():
+            entries = self._read(); entries[entry['id']] = entry; self._owned.add(entry['id']); self._write(entries)
+        return entry['id']
+
+    def advance(self, entry_id, state, **fields):
+        with self._file_lock():
+            entries = self._read(); entry = entries.get(entry_id)
+            if entry is None: return
+            entry.update(fields); entry['state'] = state; self._write(entries)
+
+    def finish(self, entry_id):
+        with self._file_lock():
+            entries = self._read(); self._owned.discard(entry_id)
+            if entries.pop(entry_id, None) is not None: self._write(entries)
+
+    def entries(self):
+        with self._file_lock(): return list(self._read().values())
+
+    def claim_orphans(self):
+        with self._file_lock():
+            entries = self._read(); orphans = [entry for entry in entries.values() if entry['id'] not in self._owned and not process_alive(entry.get('pid'))]
+            for entry in orphans: entry['pid'] = os.getpid(); self._owned.add(entry['id'])
+            if orphans: self._write(entries)
+        return [dict(entry) for entry in orphans]
+
+    def _write(self, entries):
+        tmp_path = f"{self.journal_path}.tmp"
+        try:
+            if not entries:
+                if os.path.exists(self.journal_path): os.remove(self.journal_path)
+                return
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'entries': list(entries.values())}, f, indent=1); f.flush(); os.fsync(f.fileno())
+            os.replace(tmp_path, self.journal_path)
+        except OSError as e: print(f"Warning: Could not write replace journal: {e}")
+
+_journal = None
+_journal_lock = threading.Lock()
+
+def get_replace_journal():
+    global _journal
+    with _journal_lock:
+        if _journal is None: _journal = ReplaceJournal(get_app_file_path(REPLACE_JOURNAL_FILENAME))
+        return _journal
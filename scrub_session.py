@@ -0,0 +1,77 @@
+import math
+import threading
+from ffmpeg_utils import extract_thumbnail_image
+from constants import THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT, SCRUB_SESSION_MAX_FORWARD_DECODE_S
+
+try: import av
+except ImportError: av = None
+
+_fallback_notice_shown = False
+
+class ScrubSession:
+    def __init__(self, video_path, time_base=None):
+        self.video_path = video_path; self.time_base = time_base
+        self._lock = threading.Lock(); self._closed = False; self._failed = av is None
+        self._container = None; self._stream = None; self._frames = None; self._last_time = None
+        if av is None: _show_fallback_notice()
+
+    def _open(self):
+        try:
+            self._container = av.open(self.video_path); self._stream = self._container.streams.video[0]
+            self._stream.thread_type = 'AUTO'
+            print(f"Scrub session opened: {self.video_path}")
+        except Exception as e: print(f"Scrub session could not open {self.video_path}, using ffmpeg per frame: {e}"); self._failed = True; self._release()
+
+    def _release(self):
+        self._frames = None; self._last_time = None; self._stream = None
+        if self._container is not None:
+            try: self._container.close()
+            except Exception as e: print(f"Warning: Error closing scrub session: {e}")
+            self._container = None
+
+    def get_frame(self, time_seconds, cancel_token=None):
+        if self._closed: return None
+        if self._failed: return extract_thumbnail_image(self.video_path, time_seconds, self.time_base, cancel_token)
+        with self._lock:
+            try:
+                if self._closed: return None
+                if self._container is None: self._open()
+                if not self._failed: return self._decode_at(max(0.0, float(time_seconds)), cancel_token)
+            except Exception as e: print(f"Scrub session decode error at {time_seconds}: {e}"); self._frames = None; self._last_time = None; return None
+            finally:
+                if self._closed: self._release()
+        return extract_thumbnail_image(self.video_path, time_seconds, self.time_base, cancel_token)
+
+    def _decode_at(self, target, cancel_token):
+        stream = self._stream
+        if stream.start_time: target += float(stream.start_time * stream.time_base)
+        if self._frames is None or self._last_time is None or not (self._last_time < target <= self._last_time + SCRUB_SESSION_MAX_FORWARD_DECODE_S):
+            self._container.seek(int(target / stream.time_base), stream=stream, backward=True, any_frame=False)
+            self._frames = self._container.decode(stream)
+        frame_step = 1.0 / float(stream.average_rate) if stream.average_rate else 0.0
+        previous = None
+        for frame in self._frames:
+            if cancel_token and cancel_token.cancelled: self._frames = None; self._last_time = None; return None
+            if frame.time is None: continue
+            self._last_time = frame.time
+            if frame.time + frame_step / 2 >= target: return _frame_to_thumbnail(frame)
+            previous = frame
+        self._frames = None; self._last_time = None
+        return _frame_to_thumbnail(previous) if previous is not None else None
+
+    def close(self):
+        self._closed = True
+        if self._lock.acquire(blocking=False):
+            try: self._release()
+            finally: self._lock.release()
+
+def _frame_to_thumbnail(frame):
+    scale = max(THUMBNAIL_WIDTH / frame.width, THUMBNAIL_HEIGHT / frame.height)
+    scaled_w = max(THUMBNAIL_WIDTH, math.ceil(frame.width * scale)); scaled_h = max(THUMBNAIL_HEIGHT, math.ceil(frame.height * scale))
+    image = frame.to_image(width=scaled_w, height=scaled_h)
+    left = (scaled_w - THUMBNAIL_WIDTH) // 2; top = (scaled_h - THUMBNAIL_HEIGHT) // 2
+    return image.crop((left, top, left + THUMBNAIL_WIDTH, top + THUMBNAIL_HEIGHT))
+
+def _show_fallback_notice():
+    global _fallback_notice_shown
+    if not _fallback_notice_shown: print("PyAV not installed; scrubbing spawns ffmpeg per thumbnail. Install 'av' for a persistent decoder."); _fallback_notice_shown = True
@@ -0,0 +1,39 @@
+from constants import MIN_SEGMENT_DURATION_S
+
+def normalize_segments(segments, min_duration=MIN_SEGMENT_DURATION_S):
+    merged = []
+    for start, end in sorted((float(min(a, b)), float(max(a, b))) for a, b in segments):
+        if end - start < min_duration: continue
+        if merged and start <= merged[-1][1]: merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else: merged.append((start, end))
+    return merged
+
+class SegmentList:
+    def __init__(self, segments=None):
+        self._segments = normalize_segments(segments or [])
+
+    def add(self, start, end):
+        self._segments = normalize_segments(self._segments + [(start, end)])
+
+    def remove(self, index):
+        if 0 <= index < len(self._segments): del self._segments[index]
+
+    def clear(self):
+        self._segments = []
+
+    def clamp(self, duration):
+        self._segments = normalize_segments([(a, min(b, duration)) for a, b in self._segments if a < duration])
+
+    @property
+    def segments(self):
+        return list(self._segments)
+
+    @property
+    def total_duration(self):
+        return sum(b - a for a, b in self._segments)
+
+    def __len__(self):
+        return len(self._segments)
+
+    def __bool__(self):
+        return bool(self._segments)
@@ -0,0 +1,60 @@
+import threading
+from collections import OrderedDict
+from constants import THUMBNAIL_CACHE_MAX_BYTES, THUMBNAIL_CACHE_BUCKET_S
+
+class ThumbnailEntry:
+    def __init__(self, pil_image):
+        self.pil_image = pil_image; self.ctk_image = None
+        self.size_bytes = pil_image.width * pil_image.height * len(pil_image.getbands())
+
+class ThumbnailCache:
+    def __init__(self, max_bytes=THUMBNAIL_CACHE_MAX_BYTES, bucket_seconds=THUMBNAIL_CACHE_BUCKET_S):
+        self.max_bytes = max_bytes; self.bucket_seconds = bucket_seconds
+        self._entries = OrderedDict(); self._lock = threading.Lock()
+        self.total_bytes = 0; self.hits = 0; self.misses = 0; self.evictions = 0
+
+    def make_key(self, identity, time_seconds):
+        return (identity, int(round(max(0.0, float(time_seconds)) / self.bucket_seconds)))
+
+    def get(self, identity, time_seconds):
+        if not identity: return None
+        return self._get(self.make_key(identity, time_seconds))
+
+    def put(self, identity, time_seconds, pil_image):
+        if not identity or pil_image is None: return None
+        return self._put(self.make_key(identity, time_seconds), pil_image)
+
+    def get_filmstrip(self, identity):
+        if not identity: return None
+        return self._get((identity, 'filmstrip'))
+
+    def put_filmstrip(self, identity, pil_image):
+        if not identity or pil_image is None: return None
+        return self._put((identity, 'filmstrip'), pil_image)
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None: self.misses += 1; return None
+            self._entries.move_to_end(key); self.hits += 1
+            return entry
+
+    def _put(self, key, pil_image):
+        entry = ThumbnailEntry(pil_image)
+        if entry.size_bytes > self.max_bytes: return entry
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old: self.total_bytes -= old.size_bytes
+            self._entries[key] = entry; self.total_bytes += entry.size_bytes
+            while self.total_bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False); self.total_bytes -= evicted.size_bytes; self.evictions += 1
+        return entry
+
+    def clear(self):
+        with self._lock: self._entries.clear(); self.total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'entries': len(self._entries), 'bytes': self.total_bytes, 'max_bytes': self.max_bytes, 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions, 'hit_rate': (self.hits / lookups) if lookups else 0.0}
@@ -0,0 +1,54 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from ffmpeg_utils import CancelToken
+from constants import THUMBNAIL_WORKER_COUNT
+
+class ThumbnailRequest:
+    def __init__(self, slot, work, callback):
+        self.slot = slot; self.work = work; self.callback = callback; self.token = CancelToken()
+
+class ThumbnailWorkerPool:
+    def __init__(self, max_workers=THUMBNAIL_WORKER_COUNT):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="trimmy-thumb")
+        self._lock = threading.Lock(); self._running = {}; self._pending = {}; self._closed = False
+        self.dropped = 0
+
+    def submit(self, slot, work, callback):
+        request = ThumbnailRequest(slot, work, callback)
+        with self._lock:
+            if self._closed: return None
+            if self._pending.pop(slot, None) is not None: self.dropped += 1
+            self._pending[slot] = request
+            running = self._running.get(slot)
+            if running is None: self._dispatch(slot)
+            elif not running.token.cancelled: running.token.cancel(); self.dropped += 1
+        return request
+
+    def _dispatch(self, slot):
+        request = self._pending.pop(slot, None)
+        if request is None: return
+        self._running[slot] = request; self._executor.submit(self._run, request)
+
+    def _run(self, request):
+        try:
+            if request.token.cancelled: return
+            result = request.work(request.token)
+            if not request.token.cancelled: request.callback(result)
+        except Exception as e: print(f"Thumbnail worker error ({request.slot}): {e}")
+        finally:
+            with self._lock:
+                if self._running.get(request.slot) is request: del self._running[request.slot]
+                if not self._closed: self._dispatch(request.slot)
+
+    def cancel(self, slot=None):
+        with self._lock:
+            slots = [slot] if slot else list(set(self._running) | set(self._pending))
+            for s in slots:
+                self._pending.pop(s, None)
+                running = self._running.get(s)
+                if running: running.token.cancel()
+
+    def shutdown(self):
+        self.cancel()
+        with self._lock: self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,98 @@
+import os
+import shutil
+import platform
+import threading
+import subprocess
+
+_registry_lock = threading.Lock()
+_tools = {}
+
+def hidden_startupinfo():
+    if platform.system() != 'Windows': return None
+    si = subprocess.STARTUPINFO(); si.dwFlags |= subprocess.STARTF_USESHOWWINDOW; si.wShowWindow = subprocess.SW_HIDE
+    return si
+
+def _run_tool(path, args):
+    try:
+        proc = subprocess.run([path, '-hide_banner'] + args, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='replace', startupinfo=hidden_startupinfo())
+        return proc.stdout
+    except (OSError, subprocess.CalledProcessError) as e: print(f"Warning: '{os.path.basename(path)} {' '.join(args)}' failed: {e}"); return ""
+
+class ToolInfo:
+    def __init__(self, name, path, mtime_ns, version, build_config):
+        self.name = name; self.path = path; self.mtime_ns = mtime_ns
+        self.version = version; self.build_config = build_config
+        self._lock = threading.Lock(); self._encoders = None; self._filters = None; self._hwaccels = None
+
+    @property
+    def encoders(self):
+        with self._lock:
+            if self._encoders is None: self._encoders = _parse_codec_list(_run_tool(self.path, ['-encoders']))
+            return self._encoders
+
+    @property
+    def filters(self):
+        with self._lock:
+            if self._filters is None: self._filters = _parse_filter_list(_run_tool(self.path, ['-filters']))
+            return self._filters
+
+    @property
+    def hwaccels(self):
+        with self._lock:
+            if self._hwaccels is None:
+                out = _run_tool(self.path, ['-hwaccels']).splitlines()
+                self._hwaccels = frozenset(l.strip() for l in out if l.strip() and not l.rstrip().endswith(':'))
+            return self._hwaccels
+
+    def has_encoder(self, encoder): return encoder in self.encoders
+    def has_filter(self, filter_name): return filter_name in self.filters
+    def has_hwaccel(self, hwaccel): return hwaccel in self.hwaccels
+
+    def __repr__(self): return f"ToolInfo({self.name!r}, {self.path!r}, version={self.version!r})"
+
+def _parse_codec_list(text):
+    names = set(); in_list = False
+    for line in text.splitlines():
+        if line.strip().startswith('------'): in_list = True; continue
+        parts = line.split()
+        if in_list and len(parts) >= 2: names.add(parts[1])
+    return frozenset(names)
+
+def _parse_filter_list(text):
+    names = set()
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) >= 3 and '->' in parts[2]: names.add(parts[1])
+    return frozenset(names)
+
+def _probe_tool(name, path, mtime_ns):
+    try:
+        proc = subprocess.run([path, '-version'], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='replace', startupinfo=hidden_startupinfo())
+    except (OSError, subprocess.CalledProcessError) as e: print(f"Error: {name} at {path} not executable: {e}"); return None
+    version = "unknown"; build_config = ""
+    for line in proc.stdout.splitlines():
+        parts = line.split()
+        if len(parts) >= 3 and parts[1] == 'version' and version == "unknown": version = parts[2]
+        elif line.startswith('configuration:'): build_config = line[len('configuration:'):].strip()
+    print(f"Found {name} {version} at {path}")
+    return ToolInfo(name, path, mtime_ns, version, build_config)
+
+def get_tool(name):
+    with _registry_lock:
+        cached = _tools.get(name)
+        if cached:
+            try:
+                if os.stat(cached.path).st_mtime_ns == cached.mtime_ns: return cached
+            except OSError: pass
+            print(f"{name} binary changed or moved, re-validating.")
+        path = shutil.which(name)
+        try: mtime_ns = os.stat(path).st_mtime_ns if path else None
+        except OSError: mtime_ns = None
+        info = _probe_tool(name, path, mtime_ns) if mtime_ns is not None else None
+        if info: _tools[name] = info
+        else: _tools.pop(name, None)
+        return info
+
+def tool_path(name):
+    info = get_tool(name)
+    return info.path if info else name
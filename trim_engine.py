@@ -0,0 +1,455 @@
+import os
+import time
+import uuid
+import errno
+import hashlib
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from fractions import Fraction
+from utils import to_exact_seconds, format_ffmpeg_timestamp, format_time, get_volume_root
+from ffmpeg_utils import CancelToken, run_with_progress, get_video_record, get_keyframe_index
+from trim_metrics import get_trim_metrics
+from replace_journal import get_replace_journal, ENCODING, ENCODED, REPLACED
+from segments import normalize_segments
+from tool_registry import get_tool, tool_path, hidden_startupinfo
+from constants import TRIM_SUFFIX, TRIM_MODE_COPY, TRIM_MODE_SMART, TRIM_MODE_REENCODE, TRIM_MODES, REENCODE_OUTPUT_ARGS, REENCODE_VIDEO_ARGS, REENCODE_AUDIO_ARGS, SMART_CUT_ENCODERS, SMART_CUT_CRF, SEGMENT_SUFFIX, CHUNKED_ENCODE_CHUNK_S, CHUNKED_ENCODE_WORKERS, REPLACE_COPY_BLOCK_SIZE, temp_files_to_cleanup
+
+class TrimError(Exception):
+    pass
+
+class TrimCancelled(TrimError):
+    pass
+
+class TrimResult:
+    def __init__(self, output_path, deleted_original=None, warning=None, output_paths=None):
+        self.output_path = output_path; self.deleted_original = deleted_original; self.warning = warning
+        self.output_paths = output_paths or [output_path]
+
+def output_extension(source, mode=TRIM_MODE_COPY):
+    if mode not in TRIM_MODES: raise TrimError(f"Unknown trim mode: {mode}")
+    return ".mp4" if mode == TRIM_MODE_REENCODE else os.path.splitext(source)[1]
+
+def unique_output_path(source, output_directory, custom_name=None, extension=None, suffix=""):
+    in_base, in_ext = os.path.splitext(os.path.basename(source))
+    target_ext = ".mp4" if custom_name else (extension or in_ext)
+    file_base = (os.path.splitext(custom_name)[0] if custom_name else f"{in_base}{TRIM_SUFFIX}") + suffix
+    output_path = os.path.join(output_directory, f"{file_base}{target_ext}"); counter = 1
+    while not _reserve_path(output_path): output_path = os.path.join(output_directory, f"{file_base}_{counter}{target_ext}"); counter += 1
+    return output_path
+
+def _reserve_path(path):
+    try: os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)); return True
+    except FileExistsError: return False
+    except OSError as e: raise TrimError(f"Cannot create output in {os.path.dirname(path)}: {e}") from e
+
+def temp_output_path(source, output_directory, extension=None):
+    base, ext = os.path.splitext(os.path.basename(source))
+    return os.path.join(output_directory, f"{base}_temp_trim_{uuid.uuid4().hex}{extension or ext}")
+
+def trim_range(start, end, time_base=None):
+    start_exact = to_exact_seconds(start, time_base); end_exact = to_exact_seconds(end, time_base)
+    return start_exact, max(Fraction(1, 10), end_exact - start_exact)
+
+def build_trim_command(source, start, end, output_path, time_base=None, mode=TRIM_MODE_COPY):
+    start_exact, trim_dur = trim_range(start, end, time_base)
+    cmd = [tool_path('ffmpeg'), '-hide_banner', '-loglevel', 'error', '-ss', format_ffmpeg_timestamp(start_exact), '-i', source, '-t', format_ffmpeg_timestamp(trim_dur)]
+    if mode == TRIM_MODE_REENCODE: cmd += ['-map', '0:v:0?', '-map', '0:a?'] + REENCODE_OUTPUT_ARGS
+    elif mode == TRIM_MODE_COPY: cmd += ['-c', 'copy', '-map', '0', '-avoid_negative_ts', 'make_zero']
+    else: raise TrimError(f"Unknown trim mode: {mode}")
+    return cmd + ['-y', output_path]
+
+def _run_ffmpeg(cmd, media_seconds, output_path, cancel_token=None, on_progress=None):
+    try: progress = run_with_progress(cmd, media_seconds, cancel_token, on_progress, startupinfo=hidden_startupinfo())
+    except subprocess.CalledProcessError as e:
+        _remove_quietly(output_path); err_det = e.stderr.decode('utf-8', 'replace') if e.stderr else "No stderr"
+        raise TrimError(f"FFmpeg failed (code {e.returncode}):\n{err_det[-500:]}") from e
+    except OSError as e: _remove_quietly(output_path); raise TrimError(f"Could not run ffmpeg: {e}") from e
+    if progress is None: _remove_quietly(output_path); raise TrimCancelled("Trim cancelled.")
+    if not (os.path.exists(output_path) and os.path.getsize(output_path) > 0): _remove_quietly(output_path); raise TrimError("FFmpeg OK, but output missing/empty.")
+    return progress
+
+def run_trim(source, start, end, output_path, time_base=None, cancel_token=None, mode=TRIM_MODE_COPY, on_progress=None):
+    if not source or not os.path.exists(source): raise TrimError("Original video path invalid.")
+    if not get_tool('ffmpeg'): raise TrimError("ffmpeg not found in PATH.")
+    if mode == TRIM_MODE_SMART: return run_smart_trim(source, start, end, output_path, time_base, cancel_token, on_progress)
+    if mode == TRIM_MODE_REENCODE and _chunked_encode['workers'] > 1 and float(trim_range(start, end, time_base)[1]) >= 2 * _chunked_encode['chunk_seconds']:
+        return run_chunked_reencode(source, start, end, output_path, time_base, cancel_token, on_progress)
+    return _run_single_trim(source, start, end, output_path, time_base, cancel_token, mode, on_progress)
+
+def _run_single_trim(source, start, end, output_path, time_base=None, cancel_token=None, mode=TRIM_MODE_COPY, on_progress=None):
+    cmd = build_trim_command(source, start, end, output_path, time_base, mode); print(f"FFmpeg: {' '.join(cmd)}")
+    media_seconds = float(trim_range(start, end, time_base)[1])
+    progress = _run_ffmpeg(cmd, media_seconds, output_path, cancel_token, on_progress)
+    record_trim_metrics(source, output_path, mode, media_seconds, progress.elapsed, os.path.getsize(output_path))
+    return output_path
+
+def plan_smart_cut(keyframes, start, end, tolerance=0.0005):
+    inside = [k for k in keyframes if start - tolerance <= k <= end + tolerance]
+    if len(inside) < 2 or inside[-1] - inside[0] <= tolerance: return [('encode', start, end)]
+    first_kf, last_kf = inside[0], inside[-1]; plan = []
+    if first_kf - start > tolerance: plan.append(('encode', start, first_kf))
+    plan.append(('copy', max(start, first_kf), last_kf))
+    if end - last_kf > tolerance: plan.append(('encode', last_kf, end))
+    return plan
+
+def smart_cut_encoder_args(video_stream):
+    encoder = SMART_CUT_ENCODERS.get(video_stream.get('codec_name'))
+    ffmpeg = get_tool('ffmpeg')
+    if not encoder or not ffmpeg or not ffmpeg.has_encoder(encoder): return None
+    args = ['-c:v', encoder, '-crf', str(SMART_CUT_CRF), '-preset', 'medium']
+    profile = (video_stream.get('profile') or '').lower().replace(' ', '').replace('constrained', '')
+    if profile in ('baseline', 'main', 'high', 'high10', 'high422', 'main10'): args += ['-profile:v', profile]
+    if video_stream.get('pix_fmt'): args += ['-pix_fmt', video_stream['pix_fmt']]
+    return args
+
+def _concat_list_line(path):
+    return "file '" + path.replace("'", "'\\''") + "'\n"
+
+def _offset_progress(on_progress, offset, total, started):
+    if not on_progress: return None
+    def callback(progress):
+        progress.out_time += offset; progress.total_seconds = total; progress.finished = False; progress.elapsed = time.monotonic() - started
+        on_progress(progress)
+    return callback
+
+def run_smart_trim(source, start, end, output_path, time_base=None, cancel_token=None, on_progress=None):
+    record = get_video_record(source)
+    video = next((st for st in (record or {}).get('streams', []) if st.get('codec_type') == 'video'), None)
+    encoder_args = smart_cut_encoder_args(video) if video else None
+    if not encoder_args:
+        print(f"Smart cut unsupported for {video.get('codec_name') if video else 'this file'}; re-encoding instead.")
+        return run_trim(source, start, end, output_path, time_base, cancel_token, TRIM_MODE_REENCODE, on_progress)
+    keyframes = get_keyframe_index(source, cancel_token)
+    if cancel_token and cancel_token.cancelled: raise TrimCancelled("Trim cancelled.")
+    if not keyframes:
+        print("No keyframe index available; re-encoding instead.")
+        return run_trim(source, start, end, output_path, time_base, cancel_token, TRIM_MODE_REENCODE, on_progress)
+    start_exact, trim_dur = trim_range(start, end, time_base); seg_start = float(start_exact); seg_end = seg_start + float(trim_dur)
+    plan = plan_smart_cut(keyframes, seg_start, seg_end)
+    print("Smart cut plan: " + ", ".join(f"{kind} {a:.3f}-{b:.3f}" for kind, a, b in plan))
+    ffmpeg = tool_path('ffmpeg'); work_base = os.path.splitext(output_path)[0] + f"_smartcut_{uuid.uuid4().hex[:8]}"
+    parts = []; list_path = work_base + ".txt"; temp_files_to_cleanup.append(list_path); started = time.monotonic(); done = 0.0
+    try:
+        for i, (kind, a, b) in enumerate(plan):
+            part = f"{work_base}_part{i}.ts"; parts.append(part); temp_files_to_cleanup.append(part)
+            seek = a + 0.001 if kind == 'copy' else a
+            cmd = [ffmpeg, '-hide_banner', '-loglevel', 'error', '-ss', format_ffmpeg_timestamp(seek), '-i', source, '-t', format_ffmpeg_timestamp(b - seek),
+                   '-map', '0:v:0', '-an', '-sn', '-dn'] + (['-c:v', 'copy'] if kind == 'copy' else encoder_args) + ['-f', 'mpegts', '-y', part]
+            print(f"FFmpeg: {' '.join(cmd)}")
+            _run_ffmpeg(cmd, b - a, part, cancel_token, _offset_progress(on_progress, done, seg_end - seg_start, started)); done += b - a
+        with open(list_path, 'w', encoding='utf-8') as f: f.writelines(_concat_list_line(os.path.abspath(part)) for part in parts)
+        cmd = [ffmpeg, '-hide_banner', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', list_path,
+               '-ss', format_ffmpeg_timestamp(start_exact), '-t', format_ffmpeg_timestamp(trim_dur), '-i', source,
+               '-map', '0:v:0', '-map', '1:a?', '-c', 'copy', '-avoid_negative_ts', 'make_zero', '-y', output_path]
+        print(f"FFmpeg: {' '.join(cmd)}")
+        _run_ffmpeg(cmd, seg_end - seg_start, output_path, cancel_token)
+    finally:
+        for path in parts + [list_path]:
+            _remove_quietly(path)
+            if path in temp_files_to_cleanup: temp_files_to_cleanup.remove(path)
+    encoded = sum(b - a for kind, a, b in plan if kind == 'encode')
+    print(f"Smart cut re-encoded {encoded:.2f}s of {seg_end - seg_start:.2f}s.")
+    record_trim_metrics(source, output_path, TRIM_MODE_SMART, seg_end - seg_start, time.monotonic() - started, os.path.getsize(output_path))
+    return output_path
+
+_chunked_encode = {'chunk_seconds': CHUNKED_ENCODE_CHUNK_S, 'workers': CHUNKED_ENCODE_WORKERS, 'slots': threading.BoundedSemaphore(CHUNKED_ENCODE_WORKERS)}
+
+def configure_chunked_encode(chunk_seconds=None, workers=None):
+    try:
+        if chunk_seconds is not None: _chunked_encode['chunk_seconds'] = max(1.0, float(chunk_seconds))
+        if workers is not None: _chunked_encode['workers'] = max(1, int(workers)); _chunked_encode['slots'] = threading.BoundedSemaphore(_chunked_encode['workers'])
+    except (TypeError, ValueError) as e: print(f"Warning: Invalid chunked encode settings ({chunk_seconds!r}, {workers!r}): {e}")
+
+def _acquire_chunk_slot(slots, token):
+    while not slots.acquire(timeout=0.2):
+        if token.cancelled: raise TrimCancelled("Trim cancelled.")
+
+def plan_chunks(keyframes, start, end, chunk_seconds):
+    bounds = [start]
+    for k in sorted(keyframes):
+        if k - bounds[-1] >= chunk_seconds and end - k >= chunk_seconds / 2: bounds.append(k)
+    return list(zip(bounds, bounds[1:] + [end]))
+
+def run_chunked_reencode(source, start, end, output_path, time_base=None, cancel_token=None, on_progress=None, chunk_seconds=None, workers=None):
+    chunk_seconds = chunk_seconds or _chunked_encode['chunk_seconds']; workers = workers or _chunked_encode['workers']
+    streams = (get_video_record(source) or {}).get('streams', [])
+    video = next((st for st in streams if st.get('codec_type') == 'video'), None); has_audio = any(st.get('codec_type') == 'audio' for st in streams)
+    keyframes = get_keyframe_index(source, cancel_token) if video else None
+    if cancel_token and cancel_token.cancelled: raise TrimCancelled("Trim cancelled.")
+    start_exact, trim_dur = trim_range(start, end, time_base); seg_start = float(start_exact); total = float(trim_dur)
+    chunks = plan_chunks(keyframes, seg_start, seg_start + total, chunk_seconds) if keyframes else []
+    if len(chunks) < 2:
+        print("Clip cannot be split at keyframes; encoding in a single process.")
+        return _run_single_trim(source, start, end, output_path, time_base, cancel_token, TRIM_MODE_REENCODE, on_progress)
+    slots = _chunked_encode['slots']; threads = max(1, (os.cpu_count() or workers) // _chunked_encode['workers']); workers = min(workers, len(chunks))
+    print(f"Chunked encode: {len(chunks)} chunks of ~{chunk_seconds:.0f}s on {workers} workers ({threads} threads each)")
+    ffmpeg = tool_path('ffmpeg'); work_base = os.path.splitext(output_path)[0] + f"_chunks_{uuid.uuid4().hex[:8]}"
+    parts = [f"{work_base}_part{i}.ts" for i in range(len(chunks))]; audio_part = f"{work_base}_audio.m4a" if has_audio else None; list_path = work_base + ".txt"
+    work_files = parts + [list_path] + ([audio_part] if audio_part else []); temp_files_to_cleanup.extend(work_files)
+    token = cancel_token or CancelToken(); started = time.monotonic(); progress_lock = threading.Lock(); chunk_done = [0.0] * len(chunks); chunk_sizes = [0] * len(chunks)
+
+    def chunk_progress(index):
+        if not on_progress: return None
+        def callback(progress):
+            with progress_lock:
+                chunk_done[index] = min(progress.out_time, chunks[index][1] - chunks[index][0]); chunk_sizes[index] = progress.total_size
+                out_time = sum(chunk_done); total_size = sum(chunk_sizes)
+            progress.elapsed = time.monotonic() - started; progress.out_time = out_time; progress.total_seconds = total; progress.total_size = total_size
+            progress.speed = out_time / progress.elapsed if progress.elapsed > 0 else None; progress.bitrate_kbps = None; progress.finished = False
+            on_progress(progress)
+        return callback
+
+    def encode_chunk(index):
+        a, b = chunks[index]
+        cmd = [ffmpeg, '-hide_banner', '-loglevel', 'error', '-ss', format_ffmpeg_timestamp(a), '-i', source, '-t', format_ffmpeg_timestamp(b - a),
+               '-map', '0:v:0', '-an', '-sn', '-dn'] + REENCODE_VIDEO_ARGS + ['-threads', str(threads), '-f', 'mpegts', '-y', parts[index]]
+        _acquire_chunk_slot(slots, token)
+        try: chunk_started = time.monotonic(); _run_ffmpeg(cmd, b - a, parts[index], token, chunk_progress(index))
+        finally: slots.release()
+        return time.monotonic() - chunk_started
+
+    def encode_audio():
+        cmd = [ffmpeg, '-hide_banner', '-loglevel', 'error', '-ss', format_ffmpeg_timestamp(start_exact), '-i', source, '-t', format_ffmpeg_timestamp(trim_dur),
+               '-map', '0:a', '-vn', '-sn', '-dn'] + REENCODE_AUDIO_ARGS + ['-y', audio_part]
+        _run_ffmpeg(cmd, total, audio_part, token)
+
+    timings = [None] * len(chunks); failure = None
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="trimmy-chunk") as pool:
+            futures = {pool.submit(encode_audio): None} if audio_part else {}
+            futures.update({pool.submit(encode_chunk, i): i for i in range(len(chunks))})
+            for future in as_completed(futures):
+                index = futures[future]
+                try: elapsed = future.result()
+                except Exception as e:
+                    if failure is None: failure = e if isinstance(e, TrimError) else TrimError(f"Chunk encode failed: {e}"); token.cancel()
+                    continue
+                if index is None: continue
+                a, b = chunks[index]; timings[index] = elapsed
+                print(f"Chunk {index + 1}/{len(chunks)} {format_time(a)}-{format_time(b)}: {b - a:.1f}s media in {elapsed:.1f}s ({(b - a) / max(elapsed, 1e-3):.2f}x)")
+        if failure: raise failure
+        with open(list_path, 'w', encoding='utf-8') as f: f.writelines(_concat_list_line(os.path.abspath(part)) for part in parts)
+        cmd = [ffmpeg, '-hide_banner', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', list_path] + (['-i', audio_part] if audio_part else []) + \
+              ['-map', '0:v:0'] + (['-map', '1:a'] if audio_part else []) + ['-c', 'copy', '-y', output_path]
+        print(f"FFmpeg: {' '.join(cmd)}"); _run_ffmpeg(cmd, total, output_path, token)
+    finally:
+        for path in work_files:
+            _remove_quietly(path)
+            if path in temp_files_to_cleanup: temp_files_to_cleanup.remove(path)
+    wall_seconds = time.monotonic() - started
+    print(f"Chunked encode finished in {wall_seconds:.1f}s; chunks took {sum(timings):.1f}s combined ({sum(timings) / max(wall_seconds, 1e-3):.1f}x parallelism).")
+    record_trim_metrics(source, output_path, TRIM_MODE_REENCODE, total, wall_seconds, os.path.getsize(output_path),
+                        chunks=[{'start': round(a, 3), 'end': round(b, 3), 'wall_seconds': round(t, 3)} for (a, b), t in zip(chunks, timings)], workers=workers)
+    return output_path
+
+def record_trim_metrics(source, output_path, mode, media_seconds, wall_seconds, output_bytes, **extra):
+    wall_seconds = max(wall_seconds, 1e-3)
+    entry = {'time': time.time(), 'source': source, 'output': output_path, 'mode': mode, 'media_seconds': round(media_seconds, 3), 'wall_seconds': round(wall_seconds, 3),
+             'output_bytes': output_bytes, 'speed': round(media_seconds / wall_seconds, 3), 'bytes_per_second': round(output_bytes / wall_seconds),
+             'input_volume': get_volume_root(source), 'output_volume': get_volume_root(os.path.dirname(os.path.abspath(output_path))), **extra}
+    print(f"Trim throughput: {entry['speed']:.2f}x realtime, {entry['bytes_per_second'] / 1048576:.1f} MB/s ({media_seconds:.1f}s media in {wall_seconds:.1f}s)")
+    get_trim_metrics().record(entry)
+
+def same_filesystem(path_a, path_b):
+    try: return os.stat(path_a).st_dev == os.stat(path_b).st_dev
+    except OSError: return False
+
+def _same_path(path_a, path_b):
+    return os.path.normcase(os.path.abspath(path_a)) == os.path.normcase(os.path.abspath(path_b))
+
+def _fsync_file(path):
+    with open(path, 'rb+') as f: os.fsync(f.fileno())
+
+def _fsync_directory(directory):
+    if os.name == 'nt': return
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+        try: os.fsync(fd)
+        finally: os.close(fd)
+    except OSError as e: print(f"Warning: Could not sync directory {directory}: {e}")
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(REPLACE_COPY_BLOCK_SIZE), b''): digest.update(block)
+    return digest.hexdigest()
+
+def copy_verified(source_path, destination_path):
+    partial_path = f"{destination_path}.partial"; digest = hashlib.sha256()
+    try:
+        with open(source_path, 'rb') as src, open(partial_path, 'wb') as dst:
+            for block in iter(lambda: src.read(REPLACE_COPY_BLOCK_SIZE), b''): digest.update(block); dst.write(block)
+            dst.flush(); os.fsync(dst.fileno())
+        if os.path.getsize(partial_path) != os.path.getsize(source_path) or _file_sha256(partial_path) != digest.hexdigest():
+            raise TrimError(f"Verification failed copying {os.path.basename(source_path)} to {os.path.dirname(destination_path)}.")
+        os.replace(partial_path, destination_path); _fsync_directory(os.path.dirname(destination_path))
+    except OSError as e: _remove_quietly(partial_path); raise TrimError(f"Could not copy {os.path.basename(source_path)} to {os.path.dirname(destination_path)}: {e}") from e
+    except TrimError: _remove_quietly(partial_path); raise
+
+def finalize_output(temp_path, final_path):
+    try: _fsync_file(temp_path)
+    except OSError as e: raise TrimError(f"Could not flush {os.path.basename(temp_path)} to disk: {e}") from e
+    if same_filesystem(os.path.dirname(temp_path), os.path.dirname(final_path)):
+        try: os.replace(temp_path, final_path); _fsync_directory(os.path.dirname(final_path)); return
+        except OSError as e:
+            if e.errno != errno.EXDEV: raise TrimError(f"Could not move {os.path.basename(temp_path)} into place: {e}") from e
+    print(f"{os.path.dirname(final_path)} is on another filesystem; copying and verifying.")
+    copy_verified(temp_path, final_path); _remove_quietly(temp_path)
+
+def trim_video(source, start, end, output_directory, custom_name=None, delete_original=False, time_base=None, cancel_token=None, on_status=None, mode=TRIM_MODE_COPY, on_progress=None):
+    extension = output_extension(source, mode)
+    if not delete_original: return TrimResult(run_trim(source, start, end, unique_output_path(source, output_directory, custom_name, extension), time_base, cancel_token, mode, on_progress))
+    if not os.path.isdir(output_directory): raise TrimError(f"Output folder not available: {output_directory}")
+    final_path = os.path.join(output_directory, custom_name if custom_name else os.path.splitext(os.path.basename(source))[0] + extension)
+    if not same_filesystem(os.path.dirname(os.path.abspath(source)), output_directory): print(f"Output is on a different filesystem than {os.path.basename(source)}; it is deleted only after the trim is finalized.")
+    temp_path = temp_output_path(source, os.path.dirname(final_path), os.path.splitext(final_path)[1])
+    if temp_path not in temp_files_to_cleanup: temp_files_to_cleanup.append(temp_path)
+    journal = get_replace_journal(); entry_id = journal.begin(source, temp_path, final_path)
+    try: run_trim(source, start, end, temp_path, time_base, cancel_token, mode, on_progress)
+    except TrimError:
+        if temp_path in temp_files_to_cleanup: temp_files_to_cleanup.remove(temp_path)
+        journal.finish(entry_id); raise
+    journal.advance(entry_id, ENCODED, size=os.path.getsize(temp_path))
+    if temp_path in temp_files_to_cleanup: temp_files_to_cleanup.remove(temp_path)
+    if on_status: on_status("Finalizing...")
+    try: finalize_output(temp_path, final_path)
+    except TrimError as e: print(f"Finalize error: {e}"); journal.finish(entry_id); return TrimResult(temp_path, warning=f"Trimmed to temp: {os.path.basename(temp_path)}\nOriginal NOT deleted.")
+    journal.advance(entry_id, REPLACED)
+    if _same_path(final_path, source): journal.finish(entry_id); return TrimResult(final_path, deleted_original=source)
+    try: os.remove(source); print(f"Deleted original: {source}")
+    except OSError as e: journal.finish(entry_id); return TrimResult(final_path, warning=f"Trimmed to {os.path.basename(final_path)} BUT FAILED to delete original: {e}")
+    journal.finish(entry_id)
+    return TrimResult(final_path, deleted_original=source)
+
+def recover_interrupted_replaces():
+    journal = get_replace_journal(); recovered = []
+    for entry in journal.claim_orphans():
+        source, temp_path, final_path, state = entry.get('source'), entry.get('temp'), entry.get('final'), entry.get('state')
+        try:
+            _remove_quietly(f"{final_path}.partial")
+            if state == ENCODING: _remove_quietly(temp_path); print(f"Discarded interrupted trim of {source}; original kept.")
+            elif state == ENCODED and os.path.exists(temp_path) and os.path.getsize(temp_path) == entry.get('size'): finalize_output(temp_path, final_path); state = REPLACED
+            elif state == ENCODED and not (os.path.exists(final_path) and os.path.getsize(final_path) == entry.get('size')): print(f"Trimmed file for {source} is missing; original kept.")
+            else: state = REPLACED
+            if state == REPLACED:
+                if not _same_path(final_path, source) and os.path.exists(source): os.remove(source); print(f"Deleted original: {source}")
+                print(f"Resumed interrupted Trim & Delete: {final_path}"); recovered.append(final_path)
+        except (OSError, TrimError) as e: print(f"Could not resume Trim & Delete of {source}: {e}"); continue
+        journal.finish(entry['id'])
+    return recovered
+
+def build_multi_output_command(source, segments, output_paths, time_base=None, mode=TRIM_MODE_COPY):
+    cmd = [tool_path('ffmpeg'), '-hide_banner', '-loglevel', 'error']
+    for start, end in segments:
+        start_exact, trim_dur = trim_range(start, end, time_base)
+        cmd += ['-ss', format_ffmpeg_timestamp(start_exact), '-t', format_ffmpeg_timestamp(trim_dur), '-i', source]
+    for i, output_path in enumerate(output_paths):
+        if mode == TRIM_MODE_REENCODE: cmd += ['-map', f'{i}:v:0?', '-map', f'{i}:a?'] + REENCODE_OUTPUT_ARGS
+        elif mode == TRIM_MODE_COPY: cmd += ['-map', str(i), '-c', 'copy', '-avoid_negative_ts', 'make_zero']
+        else: raise TrimError(f"Mode {mode} cannot share one ffmpeg pass")
+        cmd += ['-y', output_path]
+    return cmd
+
+def build_joined_concat_list(source, segments, time_base=None):
+    lines = []
+    for start, end in segments:
+        start_exact, trim_dur = trim_range(start, end, time_base)
+        lines += [_concat_list_line(os.path.abspath(source)), f"inpoint {format_ffmpeg_timestamp(start_exact)}\n", f"outpoint {format_ffmpeg_timestamp(start_exact + trim_dur)}\n"]
+    return ''.join(lines)
+
+def build_joined_reencode_command(source, segments, output_path, audio_count=0, time_base=None):
+    cmd = [tool_path('ffmpeg'), '-hide_banner', '-loglevel', 'error']; labels = ''
+    for i, (start, end) in enumerate(segments):
+        start_exact, trim_dur = trim_range(start, end, time_base)
+        cmd += ['-ss', format_ffmpeg_timestamp(start_exact), '-t', format_ffmpeg_timestamp(trim_dur), '-i', source]
+        labels += f"[{i}:v:0]" + ''.join(f"[{i}:a:{a}]" for a in range(audio_count))
+    outputs = "[vout]" + ''.join(f"[aout{a}]" for a in range(audio_count))
+    cmd += ['-filter_complex', f"{labels}concat=n={len(segments)}:v=1:a={audio_count}{outputs}", '-map', '[vout]']
+    for a in range(audio_count): cmd += ['-map', f'[aout{a}]']
+    return cmd + REENCODE_OUTPUT_ARGS + ['-y', output_path]
+
+def run_segments(source, segments, output_paths, join=False, time_base=None, cancel_token=None, mode=TRIM_MODE_COPY, on_progress=None):
+    if not source or not os.path.exists(source): raise TrimError("Original video path invalid.")
+    if not get_tool('ffmpeg'): raise TrimError("ffmpeg not found in PATH.")
+    segments = normalize_segments(segments)
+    if not segments: raise TrimError("No segments to export.")
+    total = sum(float(trim_range(a, b, time_base)[1]) for a, b in segments); started = time.monotonic()
+    if mode == TRIM_MODE_SMART: return _run_smart_segments(source, segments, output_paths, join, time_base, cancel_token, on_progress, total, started)
+    if join:
+        output_path = output_paths[0]
+        if mode == TRIM_MODE_REENCODE:
+            record = get_video_record(source); audio_count = sum(1 for st in (record or {}).get('streams', []) if st.get('codec_type') == 'audio')
+            cmd = build_joined_reencode_command(source, segments, output_path, audio_count, time_base); print(f"FFmpeg: {' '.join(cmd)}")
+            _run_ffmpeg(cmd, total, output_path, cancel_token, on_progress)
+        else:
+            list_path = os.path.splitext(output_path)[0] + f"_segments_{uuid.uuid4().hex[:8]}.txt"; temp_files_to_cleanup.append(list_path)
+            try:
+                with open(list_path, 'w', encoding='utf-8') as f: f.write(build_joined_concat_list(source, segments, time_base))
+                cmd = [tool_path('ffmpeg'), '-hide_banner', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', list_path,
+                       '-map', '0', '-c', 'copy', '-avoid_negative_ts', 'make_zero', '-y', output_path]
+                print(f"FFmpeg: {' '.join(cmd)}"); _run_ffmpeg(cmd, total, output_path, cancel_token, on_progress)
+            finally:
+                _remove_quietly(list_path)
+                if list_path in temp_files_to_cleanup: temp_files_to_cleanup.remove(list_path)
+        output_paths = [output_path]
+    else:
+        cmd = build_multi_output_command(source, segments, output_paths, time_base, mode); print(f"FFmpeg: {' '.join(cmd)}")
+        longest = max(float(trim_range(a, b, time_base)[1]) for a, b in segments)
+        try: _run_ffmpeg(cmd, longest, output_paths[0], cancel_token, on_progress)
+        except TrimError:
+            for path in output_paths: _remove_quietly(path)
+            raise
+        missing = [p for p in output_paths if not (os.path.exists(p) and os.path.getsize(p) > 0)]
+        if missing:
+            for path in output_paths: _remove_quietly(path)
+            raise TrimError(f"FFmpeg OK, but {len(missing)} segment output(s) missing/empty.")
+    record_trim_metrics(source, output_paths[0], mode, total, time.monotonic() - started, sum(os.path.getsize(p) for p in output_paths))
+    return output_paths
+
+def _run_smart_segments(source, segments, output_paths, join, time_base, cancel_token, on_progress, total, started):
+    ext = os.path.splitext(output_paths[0])[1]; done = 0.0
+    parts = output_paths if not join else [os.path.splitext(output_paths[0])[0] + f"_seg{i}_{uuid.uuid4().hex[:8]}{ext}" for i in range(len(segments))]
+    if join: temp_files_to_cleanup.extend(parts)
+    try:
+        for (start, end), part in zip(segments, parts):
+            run_smart_trim(source, start, end, part, time_base, cancel_token, _offset_progress(on_progress, done, total, started)); done += end - start
+        if not join: return output_paths
+        list_path = os.path.splitext(output_paths[0])[0] + f"_segments_{uuid.uuid4().hex[:8]}.txt"; parts.append(list_path); temp_files_to_cleanup.append(list_path)
+        with open(list_path, 'w', encoding='utf-8') as f: f.writelines(_concat_list_line(os.path.abspath(p)) for p in parts[:-1])
+        cmd = [tool_path('ffmpeg'), '-hide_banner', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', list_path, '-map', '0', '-c', 'copy', '-y', output_paths[0]]
+        print(f"FFmpeg: {' '.join(cmd)}"); _run_ffmpeg(cmd, total, output_paths[0], cancel_token)
+        return output_paths[:1]
+    except TrimError:
+        if not join:
+            for path in output_paths: _remove_quietly(path)
+        raise
+    finally:
+        if join:
+            for path in parts:
+                _remove_quietly(path)
+                if path in temp_files_to_cleanup: temp_files_to_cleanup.remove(path)
+
+def trim_segments(source, segments, output_directory, join=False, custom_name=None, delete_original=False, time_base=None, cancel_token=None, mode=TRIM_MODE_COPY, on_progress=None, output_path=None):
+    segments = normalize_segments(segments); extension = output_extension(source, mode)
+    if not segments: raise TrimError("No segments to export.")
+    if output_path and (join or len(segments) == 1): output_paths = [output_path]
+    elif join or len(segments) == 1: output_paths = [unique_output_path(source, output_directory, custom_name, extension)]
+    else: output_paths = [unique_output_path(source, output_directory, custom_name, extension, f"{SEGMENT_SUFFIX}{i + 1}") for i in range(len(segments))]
+    try:
+        if len(segments) == 1: run_trim(source, segments[0][0], segments[0][1], output_paths[0], time_base, cancel_token, mode, on_progress)
+        else: output_paths = run_segments(source, segments, output_paths, join, time_base, cancel_token, mode, on_progress)
+    except TrimError:
+        for path in output_paths: _remove_quietly(path)
+        raise
+    if not delete_original: return TrimResult(output_paths[0], output_paths=output_paths)
+    try:
+        for path in output_paths: _fsync_file(path)
+        os.remove(source); print(f"Deleted original: {source}")
+    except OSError as e: return TrimResult(output_paths[0], warning=f"Exported {len(output_paths)} file(s) BUT FAILED to delete original: {e}", output_paths=output_paths)
+    return TrimResult(output_paths[0], deleted_original=source, output_paths=output_paths)
+
+def _remove_quietly(path):
+    if path and os.path.exists(path):
+        try: os.remove(path)
+        except OSError as e: print(f"Error cleaning failed output: {e}")
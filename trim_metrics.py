@@ -0,0 +1,39 @@
+import json
+import threading
+from utils import get_app_file_path
+from constants import TRIM_METRICS_FILENAME
+
+class TrimMetrics:
+    def __init__(self, metrics_path):
+        self.metrics_path = metrics_path; self._lock = threading.Lock(); self._entries = None
+
+    def record(self, entry):
+        line = json.dumps(entry, separators=(',', ':'))
+        with self._lock:
+            try:
+                with open(self.metrics_path, 'a', encoding='utf-8') as f: f.write(line + '\n')
+            except OSError as e: print(f"Warning: Could not record trim metrics: {e}")
+            if self._entries is not None: self._entries.append(entry)
+
+    def load(self):
+        entries = []
+        with self._lock:
+            if self._entries is not None: return list(self._entries)
+            try:
+                with open(self.metrics_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try: entries.append(json.loads(line))
+                        except ValueError: continue
+            except FileNotFoundError: pass
+            except OSError as e: print(f"Warning: Could not read trim metrics: {e}"); return entries
+            self._entries = list(entries)
+        return entries
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+def get_trim_metrics():
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None: _metrics = TrimMetrics(get_app_file_path(TRIM_METRICS_FILENAME))
+        return _metrics
@@ -0,0 +1,99 @@
+import os
+import sys
+import argparse
+import contextlib
+from utils import parse_time, format_time
+from ffmpeg_utils import get_video_record, get_video_time_base, cleanup_temp_files
+from tool_registry import get_tool
+from preflight import run_preflight
+from trim_engine import run_trim, trim_video, trim_segments, configure_chunked_encode, recover_interrupted_replaces, unique_output_path, output_extension, TrimError
+from constants import TRIM_MODES, TRIM_MODE_COPY, CHUNKED_ENCODE_CHUNK_S, CHUNKED_ENCODE_WORKERS
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="trimmy", description="Trim videos without starting the GUI.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    trim = commands.add_parser("trim", help="Cut a time range out of a video.")
+    trim.add_argument("input", help="Source video file.")
+    trim.add_argument("--start", type=parse_time, default=0.0, help="Start time in seconds or [HH:]MM:SS[.ms] (default: 0).")
+    trim.add_argument("--end", type=parse_time, default=None, help="End time in seconds or [HH:]MM:SS[.ms] (default: end of video).")
+    trim.add_argument("--out", default=None, help="Output file or directory (default: next to the input with a _trimmy suffix).")
+    trim.add_argument("--mode", choices=TRIM_MODES, default=TRIM_MODE_COPY, help="copy: fast, cuts on keyframes; smart: re-encode only the edge GOPs; reencode: re-encode everything.")
+    trim.add_argument("--segment", nargs=2, action="append", type=parse_time, metavar=("START", "END"), help="Export this range; repeat for several segments (overrides --start/--end).")
+    trim.add_argument("--join", action="store_true", help="Join all --segment ranges into a single output file.")
+    trim.add_argument("--chunk-seconds", type=float, default=None, help=f"Re-encode: target chunk length for parallel encoding (default: {CHUNKED_ENCODE_CHUNK_S:.0f}).")
+    trim.add_argument("--chunk-workers", type=int, default=None, help=f"Re-encode: parallel ffmpeg processes, 1 disables chunking (default: {CHUNKED_ENCODE_WORKERS}).")
+    trim.add_argument("--delete-original", action="store_true", help="Replace the original: write the clip and delete the source.")
+    trim.add_argument("--ignore-space", action="store_true", help="Start even if the output volume looks too full for the estimated output.")
+    trim.add_argument("-y", "--overwrite", action="store_true", help="Overwrite --out if it already exists.")
+    return parser
+
+def print_progress(progress):
+    if not sys.stderr.isatty(): return
+    sys.stderr.write(f"\r{progress.describe():<60}" + ("\n" if progress.finished else "")); sys.stderr.flush()
+
+def check_preflight(args, source, record, media_seconds, output_directory):
+    preflight = run_preflight(source, media_seconds, output_directory, args.mode, record)
+    print(f"Preflight: {preflight.describe()}", file=sys.stderr)
+    if preflight.enough_space or args.ignore_space: return True
+    print(f"Error: Not enough free space in {output_directory} (use --ignore-space to try anyway).", file=sys.stderr); return False
+
+def run_trim_command(args, results=None):
+    results = results or sys.stdout
+    source = os.path.abspath(args.input)
+    configure_chunked_encode(args.chunk_seconds, args.chunk_workers)
+    if not os.path.isfile(source): print(f"Error: Input not found: {args.input}", file=sys.stderr); return 1
+    missing = [name for name in ('ffmpeg', 'ffprobe') if not get_tool(name)]
+    if missing: print(f"Error: {', '.join(missing)} not found in PATH.", file=sys.stderr); return 1
+    record = get_video_record(source)
+    if record is None: print(f"Error: Could not read video metadata: {args.input}", file=sys.stderr); return 1
+    duration = record.get('duration') or 0.0; end = duration if args.end is None else min(args.end, duration or args.end)
+    if args.segment: return run_segments_command(args, source, record, duration, results)
+    if end - args.start < 0.1: print(f"Error: Trim range too short ({format_time(args.start)} - {format_time(end)}).", file=sys.stderr); return 1
+    time_base = get_video_time_base(record)
+    out = os.path.abspath(args.out) if args.out else None
+    if out and os.path.isdir(out): output_directory, custom_name = out, None
+    elif out: output_directory, custom_name = os.path.dirname(out), os.path.basename(out)
+    else: output_directory, custom_name = os.path.dirname(source), None
+    if custom_name: target = out
+    elif args.delete_original: target = os.path.join(output_directory, os.path.splitext(os.path.basename(source))[0] + output_extension(source, args.mode))
+    else: target = None
+    if target and os.path.exists(target) and not args.overwrite and os.path.normcase(target) != os.path.normcase(source):
+        print(f"Error: {target} exists (use -y to overwrite).", file=sys.stderr); return 1
+    if not check_preflight(args, source, record, end - args.start, output_directory): return 1
+    if not args.delete_original:
+        output_path = out if custom_name else unique_output_path(source, output_directory, extension=output_extension(source, args.mode))
+        print(run_trim(source, args.start, end, output_path, time_base, mode=args.mode, on_progress=print_progress), file=results); return 0
+    result = trim_video(source, args.start, end, output_directory, custom_name, True, time_base, on_status=print, mode=args.mode, on_progress=print_progress)
+    if result.warning: print(f"Warning: {result.warning}", file=sys.stderr); return 2
+    print(result.output_path, file=results); return 0
+
+def run_segments_command(args, source, record, duration, results=None):
+    results = results or sys.stdout
+    segments = [(a, min(b, duration or b)) for a, b in args.segment]
+    out = os.path.abspath(args.out) if args.out else None
+    if out and not os.path.isdir(out) and not args.join: print("Error: --out must be a directory when exporting separate segments.", file=sys.stderr); return 1
+    if out and os.path.isdir(out): output_directory, custom_name = out, None
+    elif out: output_directory, custom_name = os.path.dirname(out), os.path.basename(out)
+    else: output_directory, custom_name = os.path.dirname(source), None
+    target = out if custom_name else None
+    if target and os.path.normcase(target) == os.path.normcase(source): print("Error: --out cannot be the input file when exporting segments.", file=sys.stderr); return 1
+    if target and os.path.exists(target) and not args.overwrite: print(f"Error: {target} exists (use -y to overwrite).", file=sys.stderr); return 1
+    if not check_preflight(args, source, record, sum(b - a for a, b in segments if b > a), output_directory): return 1
+    result = trim_segments(source, segments, output_directory, args.join, custom_name, args.delete_original, get_video_time_base(record), mode=args.mode, on_progress=print_progress, output_path=target)
+    for path in result.output_paths: print(path, file=results)
+    if result.warning: print(f"Warning: {result.warning}", file=sys.stderr); return 2
+    return 0
+
+def main(argv=None):
+    args = build_parser().parse_args(argv); results = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            recover_interrupted_replaces()
+            if args.command == "trim": return run_trim_command(args, results)
+        except TrimError as e: print(f"Error: {e}", file=sys.stderr); return 1
+        except KeyboardInterrupt: print("Interrupted.", file=sys.stderr); return 130
+        finally: cleanup_temp_files()
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
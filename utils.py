@@ -1,8 +1,8 @@
 import os
 import sys
-import json
+import bisect
 import datetime
-from constants import CONFIG_FILENAME
+from fractions import Fraction
 
 def format_time(seconds):
     if seconds is None or not isinstance(seconds, (int, float)) or seconds < 0:
@@ -19,6 +19,41 @@ def format_time(seconds):
         print(f"Warning: Error formatting time {seconds}: {e}")
         return "00:00:00"
 
+def parse_time(text):
+    parts = str(text).strip().split(':')
+    if not 1 <= len(parts) <= 3 or not all(p.strip() for p in parts): raise ValueError(f"Invalid time: {text!r}")
+    seconds = 0.0
+    for part in parts: seconds = seconds * 60 + float(part)
+    if seconds < 0 or seconds != seconds or seconds == float('inf'): raise ValueError(f"Invalid time: {text!r}")
+    return seconds
+
+def to_exact_seconds(seconds, time_base=None):
+    if seconds is None or not isinstance(seconds, (int, float, Fraction)) or seconds != seconds or seconds in (float('inf'), float('-inf')): return Fraction(0)
+    exact = Fraction(max(0, seconds))
+    if time_base:
+        try:
+            tb = Fraction(time_base)
+            if tb > 0: exact = round(exact / tb) * tb
+        except (ValueError, ZeroDivisionError) as e: print(f"Warning: Ignoring invalid time base {time_base}: {e}")
+    return exact
+
+def format_ffmpeg_timestamp(seconds, time_base=None):
+    micros = round(to_exact_seconds(seconds, time_base) * 1000000)
+    return f"{micros // 1000000}.{micros % 1000000:06d}"
+
+def find_nearest_keyframes(keyframes, seconds):
+    if not keyframes or seconds is None: return None, None
+    i = bisect.bisect_right(keyframes, seconds)
+    prev_kf = keyframes[i - 1] if i > 0 else None
+    next_kf = keyframes[i] if i < len(keyframes) else None
+    return prev_kf, next_kf
+
+def snap_to_keyframe(keyframes, seconds):
+    prev_kf, next_kf = find_nearest_keyframes(keyframes, seconds)
+    if prev_kf is None: return next_kf if next_kf is not None else seconds
+    if next_kf is None: return prev_kf
+    return prev_kf if seconds - prev_kf <= next_kf - seconds else next_kf
+
 def format_size(size_bytes):
     if size_bytes is None or not isinstance(size_bytes, (int, float)) or size_bytes < 0: return "N/A"
     if size_bytes == 0: return "0 B"
@@ -32,28 +67,26 @@ def format_size(size_bytes):
 
 def get_parent_directories(path):
     path = os.path.normpath(os.path.abspath(path))
-    parents = []
-    if not os.path.isdir(path): path = os.path.dirname(path)
-    if path and os.path.isdir(path): parents.append(path)
+    parents = [path]
     while True:
         parent = os.path.dirname(path)
         if parent == path or not parent: break
-        if os.path.isdir(parent): parents.append(parent)
-        else: break
-        path = parent
+        parents.append(parent); path = parent
     return parents
 
-def load_last_directory():
-    config_path = os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])), CONFIG_FILENAME)
-    try:
-        if os.path.exists(config_path):
-            with open(config_path, 'r') as f:
-                config = json.load(f)
-                last_dir = config.get("last_input_directory")
-                if last_dir and os.path.isdir(last_dir):
-                    print(f"Loaded last directory from config: {last_dir}")
-                    return last_dir
-                else: print("Config found, but last directory is invalid or missing.")
-    except (json.JSONDecodeError, IOError, Exception) as e: print(f"Error loading config file ({config_path}): {e}")
-    print("No valid last directory found in config or config does not exist.")
-    return None
\ No newline at end of file
+def get_app_file_path(filename):
+    return os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])), filename)
+
+def get_volume_root(path):
+    path = os.path.abspath(path); drive, _ = os.path.splitdrive(path)
+    if drive: return os.path.normcase(drive)
+    while not os.path.ismount(path):
+        parent = os.path.dirname(path)
+        if parent == path: break
+        path = parent
+    return path
+
+def get_file_identity(path):
+    try: st = os.stat(path)
+    except OSError: return None
+    return (os.path.normcase(os.path.abspath(path)), st.st_size, st.st_mtime_ns)